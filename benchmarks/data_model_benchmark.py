@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Memory and speed comparison of the release pipeline data model.
+
+Builds the same synthetic org twice: once with the dictionaries previously passed
+between the pipeline stages (dates kept as ISO strings and parsed on every filter),
+once with the slotted dataclasses of src/models.py (dates parsed once at ingest).
+For each representation it measures peak memory (tracemalloc) and the time to build
+the data, filter tags by period, sort them and collect the changes of each release.
+
+Usage:
+    python benchmarks/data_model_benchmark.py [REPOSITORIES] [TAGS_PER_REPOSITORY]
+
+Defaults to 200 repositories x 500 tags with 3 changes per tag.
+"""
+import datetime
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models import Change, RepoSnapshot, Tag, parse_github_datetime
+
+CHANGES_PER_TAG = 3
+START = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+PERIOD_START = datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def iso(i):
+    return (START + datetime.timedelta(days=i)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def build_dicts(repositories, tags_per_repository):
+    repos = []
+    for r in range(repositories):
+        tags = [{
+            'name': f"1.{t // 100}.{t % 100}",
+            'commit': {'sha': f"{r:04d}{t:036d}", 'date': iso(t)},
+            'message': '',
+        } for t in range(tags_per_repository)]
+        changes = [{
+            'commit_sha': f"{r:04d}{c:036d}",
+            'commit_url': f"https://github.com/keboola/component-{r}/commit/{c}",
+            'commit_message': f"Merge pull request #{c} from keboola/fix-{c}",
+            'author': 'dev',
+            'date': iso(c),
+            'pr_number': str(c),
+            'pr_url': f"https://github.com/keboola/component-{r}/pull/{c}",
+            'title': f"Fix {c}",
+        } for c in range(tags_per_repository * CHANGES_PER_TAG)]
+        repos.append({
+            'name': f"component-{r}", 'full_name': f"keboola/component-{r}",
+            'url': f"https://github.com/keboola/component-{r}", 'default_branch': 'main',
+            '_data': {'tags': tags}, '_tags': tags, '_workflow_files': [], '_package_json': None,
+            'changes': changes,
+        })
+    return repos
+
+
+def build_dataclasses(repositories, tags_per_repository):
+    repos = []
+    for r in range(repositories):
+        tags = [Tag(
+            name=f"1.{t // 100}.{t % 100}",
+            commit=f"{r:04d}{t:036d}",
+            date=parse_github_datetime(iso(t)),
+        ) for t in range(tags_per_repository)]
+        changes = [Change(
+            commit_sha=f"{r:04d}{c:036d}",
+            commit_url=f"https://github.com/keboola/component-{r}/commit/{c}",
+            commit_message=f"Merge pull request #{c} from keboola/fix-{c}",
+            author='dev',
+            date=parse_github_datetime(iso(c)),
+            title=f"Fix {c}",
+            pr_number=str(c),
+            pr_url=f"https://github.com/keboola/component-{r}/pull/{c}",
+        ) for c in range(tags_per_repository * CHANGES_PER_TAG)]
+        repo = RepoSnapshot(name=f"component-{r}", full_name=f"keboola/component-{r}",
+                            url=f"https://github.com/keboola/component-{r}", tags=tags)
+        repos.append((repo, changes))
+    return repos
+
+
+def process_dicts(repos):
+    titles = 0
+    for repo in repos:
+        tags = [tag for tag in repo['_tags']
+                if datetime.datetime.fromisoformat(tag['commit']['date'].replace('Z', '+00:00')) >= PERIOD_START]
+        tags.sort(key=lambda tag: datetime.datetime.fromisoformat(tag['commit']['date'].replace('Z', '+00:00')))
+        for i in range(len(tags)):
+            changes = repo['changes'][i * CHANGES_PER_TAG:(i + 1) * CHANGES_PER_TAG]
+            titles += len({change.get('title') for change in changes})
+    return titles
+
+
+def process_dataclasses(repos):
+    titles = 0
+    for repo, all_changes in repos:
+        tags = [tag for tag in repo.tags if tag.date >= PERIOD_START]
+        tags.sort(key=lambda tag: tag.date)
+        for i in range(len(tags)):
+            changes = all_changes[i * CHANGES_PER_TAG:(i + 1) * CHANGES_PER_TAG]
+            titles += len({change.title for change in changes})
+    return titles
+
+
+def measure(build, process, repositories, tags_per_repository):
+    # tracemalloc slows allocation down, so the build is timed in a separate untraced run
+    gc.collect()
+    tracemalloc.start()
+    repos = build(repositories, tags_per_repository)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del repos
+
+    gc.collect()
+    started = time.perf_counter()
+    repos = build(repositories, tags_per_repository)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result = process(repos)
+    process_seconds = time.perf_counter() - started
+    return memory, build_seconds, process_seconds, result
+
+
+def main():
+    repositories = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    tags_per_repository = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    print(f"Dataset: {repositories} repositories x {tags_per_repository} tags, "
+          f"{CHANGES_PER_TAG} changes per tag")
+
+    dicts = measure(build_dicts, process_dicts, repositories, tags_per_repository)
+    slotted = measure(build_dataclasses, process_dataclasses, repositories, tags_per_repository)
+    if dicts[3] != slotted[3]:
+        print("WARNING: results differ")
+    print(f"Releases in period: {slotted[3] // CHANGES_PER_TAG}")
+
+    print(f"{'':20} {'memory':>10} {'build':>10} {'filter/sort':>12}")
+    for label, (memory, build_seconds, process_seconds, _) in (('dicts', dicts), ('slotted dataclasses', slotted)):
+        print(f"{label:20} {memory / 1024 / 1024:7.1f} MiB {build_seconds * 1000:7.0f} ms {process_seconds * 1000:9.0f} ms")
+    print(f"memory saved         : {(1 - slotted[0] / dicts[0]) * 100:8.1f} %")
+    print(f"filter/sort speedup  : {dicts[2] / slotted[2]:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the workflow component-identifier scanner.
+
+Compares the previous line-by-line scan (four uncompiled re.search calls per line)
+with component_utils.scan_component_identifiers and checks both return the same result.
+
+Usage:
+    python benchmarks/workflow_scanner_benchmark.py [WORKFLOW_FILE_OR_DIR ...]
+
+Point it at checked-out .github/workflows directories of component repositories to
+measure real files. Without arguments a corpus modelled on the Keboola component
+template workflows is generated.
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.component_utils import scan_component_identifiers
+
+WORKFLOW_TEMPLATE = """name: Keboola Component Build & Deploy Pipeline
+on:
+  push:
+    branches:
+      - 'feature/*'
+      - 'bug/*'
+    tags:
+      - '*'
+
+concurrency: ci-${{{{ github.ref }}}}
+
+env:
+  KBC_DEVELOPERPORTAL_APP: "{component_id}"
+  KBC_DEVELOPERPORTAL_VENDOR: "keboola"
+  KBC_DEVELOPERPORTAL_USERNAME: "keboola+{name}_github_actions"
+  KBC_DEVELOPERPORTAL_PASSWORD: ${{{{ secrets.KBC_DEVELOPERPORTAL_PASSWORD }}}}
+  DOCKERHUB_USER: ${{{{ secrets.DOCKERHUB_USER }}}}
+  DOCKERHUB_TOKEN: ${{{{ secrets.DOCKERHUB_TOKEN }}}}
+  KBC_STORAGE_TOKEN: ${{{{ secrets.KBC_STORAGE_TOKEN }}}}
+  KBC_TEST_PROJECT_URL: ""
+  KBC_TEST_PROJECT_CONFIGS: ""
+
+jobs:
+  push_event_info:
+    name: Push Event Info
+    runs-on: ubuntu-latest
+    outputs:
+      app_image_tag: ${{{{ steps.tag.outputs.app_image_tag }}}}
+      is_semantic_tag: ${{{{ steps.tag.outputs.is_semantic_tag }}}}
+      is_default_branch: ${{{{ steps.default_branch.outputs.is_default_branch }}}}
+      is_deploy_ready: ${{{{ steps.deploy_ready.outputs.is_deploy_ready }}}}
+    steps:
+      - name: Checkout Repository
+        uses: actions/checkout@v4
+        with:
+          fetch-depth: 0
+      - name: Fetch all branches from remote repository
+        run: git fetch --prune --unshallow --tags -f
+      - name: Get current branch name
+        id: current_branch
+        run: |
+          if [[ ${{{{ github.ref }}}} != "refs/tags/"* ]]; then
+            branch_name=${{{{ github.ref_name }}}}
+            echo "branch_name=$branch_name" | tee -a $GITHUB_OUTPUT
+          else
+            raw=$(git branch -r --contains ${{{{ github.ref }}}})
+            branch="$(echo ${{raw//origin\\//}} | tr -d '\\n')"
+            echo "branch_name=$branch" | tee -a $GITHUB_OUTPUT
+          fi
+      - name: Is current branch the default branch
+        id: default_branch
+        run: |
+          echo "default_branch='${{{{ github.event.repository.default_branch }}}}'"
+          if [ "${{{{ github.event.repository.default_branch }}}}" = "${{{{ steps.current_branch.outputs.branch_name }}}}" ]; then
+             echo "is_default_branch=true" | tee -a $GITHUB_OUTPUT
+          else
+             echo "is_default_branch=false" | tee -a $GITHUB_OUTPUT
+          fi
+      - name: Set image tag
+        id: tag
+        run: |
+          TAG="${{GITHUB_REF##*/}}"
+          IS_SEMANTIC_TAG=$(echo "$TAG" | grep -q '^v\\?[0-9]\\+\\.[0-9]\\+\\.[0-9]\\+$' && echo true || echo false)
+          echo "is_semantic_tag=$IS_SEMANTIC_TAG" | tee -a $GITHUB_OUTPUT
+          echo "app_image_tag=$TAG" | tee -a $GITHUB_OUTPUT
+
+  build:
+    name: Docker Image Build
+    runs-on: ubuntu-latest
+    needs:
+      - push_event_info
+    env:
+      DOCKER_BUILDKIT: 1
+    steps:
+      - name: Checkout
+        uses: actions/checkout@v4
+      - name: Set up Docker Buildx
+        uses: docker/setup-buildx-action@v3
+      - name: Build and push
+        uses: docker/build-push-action@v5
+        with:
+          tags: ${{{{ env.KBC_DEVELOPERPORTAL_APP }}}}:latest
+          outputs: type=docker,dest=/tmp/${{{{ env.KBC_DEVELOPERPORTAL_APP }}}}.tar
+      - name: Upload artifact
+        uses: actions/upload-artifact@v4
+        with:
+          name: ${{{{ env.KBC_DEVELOPERPORTAL_APP }}}}
+          path: /tmp/${{{{ env.KBC_DEVELOPERPORTAL_APP }}}}.tar
+
+  tests:
+    name: Run Tests
+    runs-on: ubuntu-latest
+    needs:
+      - push_event_info
+      - build
+    steps:
+      - name: Checkout
+        uses: actions/checkout@v4
+      - name: Download artifact
+        uses: actions/download-artifact@v4
+        with:
+          name: ${{{{ env.KBC_DEVELOPERPORTAL_APP }}}}
+          path: /tmp
+      - name: Load Image & Run Tests
+        run: |
+          docker load --input /tmp/${{{{ env.KBC_DEVELOPERPORTAL_APP }}}}.tar
+          docker image ls -a
+          docker run ${{{{ env.KBC_DEVELOPERPORTAL_APP }}}}:latest flake8 . --config=flake8.cfg
+          echo "Running unit-tests..."
+          docker run ${{{{ env.KBC_DEVELOPERPORTAL_APP }}}}:latest python -m unittest discover
+
+  deploy:
+    name: Deploy
+    needs:
+      - push_event_info
+      - tests
+    runs-on: ubuntu-latest
+    if: needs.push_event_info.outputs.is_semantic_tag == 'true'
+    steps:
+      - name: Set Developer Portal Tag
+        uses: keboola/action-set-tag-developer-portal@master
+        with:
+          vendor: ${{{{ env.KBC_DEVELOPERPORTAL_VENDOR }}}}
+          app_id: ${{{{ env.KBC_DEVELOPERPORTAL_APP }}}}
+          username: ${{{{ env.KBC_DEVELOPERPORTAL_USERNAME }}}}
+          password: ${{{{ secrets.KBC_DEVELOPERPORTAL_PASSWORD }}}}
+          tag: ${{{{ needs.push_event_info.outputs.app_image_tag }}}}
+      - name: Update developer portal properties
+        env:
+          KBC_DEVELOPERPORTAL_ID: {component_id}
+          APP_NAME: ${{{{ env.KBC_DEVELOPERPORTAL_APP }}}}
+        run: |
+          chmod +x scripts/developer_portal/*.sh
+          scripts/developer_portal/update_properties.sh
+"""
+
+
+def legacy_scan(text):
+    """The scan previously duplicated in component_utils and github_graphql_utils."""
+    component_names = set()
+    vendors = set()
+    for line in text.split('\n'):
+        if not line.strip():
+            continue
+        app_match = re.search(r'(?i)KBC_DEVELOPERPORTAL_APP\s*:\s*[\'"]?([a-zA-Z0-9._-]+)[\'"]?', line)
+        id_match = re.search(r'(?i)KBC_DEVELOPERPORTAL_ID\s*:\s*[\'"]?([a-zA-Z0-9._-]+)[\'"]?', line)
+        app_name_match = re.search(r'(?i)APP_NAME\s*:\s*[\'"]?([a-zA-Z0-9._-]+)[\'"]?', line)
+        vendor_match = re.search(r'(?i)KBC_DEVELOPERPORTAL_VENDOR\s*:\s*[\'"]?([a-zA-Z0-9._-]+)[\'"]?', line)
+        for match in [app_match, id_match, app_name_match]:
+            if match and match.group(1) and not match.group(1).startswith('${{'):
+                component_names.add(match.group(1))
+        if vendor_match and vendor_match.group(1) and not vendor_match.group(1).startswith('${{'):
+            vendors.add(vendor_match.group(1))
+    return component_names, vendors
+
+
+def load_corpus(paths):
+    corpus = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                corpus.extend(os.path.join(root, name) for name in files if name.endswith(('.yml', '.yaml')))
+        else:
+            corpus.append(path)
+
+    contents = []
+    for file_path in sorted(corpus):
+        with open(file_path, encoding='utf-8') as workflow_file:
+            contents.append(workflow_file.read())
+    return contents
+
+
+def generated_corpus(count=200):
+    return [
+        WORKFLOW_TEMPLATE.format(component_id=f"keboola.ex-component-{i}", name=f"ex_component_{i}")
+        for i in range(count)
+    ]
+
+
+def main():
+    corpus = load_corpus(sys.argv[1:]) if len(sys.argv) > 1 else generated_corpus()
+    total_bytes = sum(len(text) for text in corpus)
+    print(f"Corpus: {len(corpus)} workflow files, {total_bytes / 1024:.0f} KiB")
+
+    mismatches = [i for i, text in enumerate(corpus) if legacy_scan(text) != scan_component_identifiers(text)]
+    if mismatches:
+        print(f"WARNING: results differ for {len(mismatches)} files")
+
+    repeat = 5
+    legacy = min(timeit.repeat(lambda: [legacy_scan(text) for text in corpus], number=1, repeat=repeat))
+    scanner = min(timeit.repeat(lambda: [scan_component_identifiers(text) for text in corpus], number=1, repeat=repeat))
+
+    print(f"line-by-line re.search : {legacy * 1000:8.2f} ms")
+    print(f"single-pass scanner    : {scanner * 1000:8.2f} ms")
+    print(f"speedup                : {legacy / scanner:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
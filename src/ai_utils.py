@@ -1,12 +1,129 @@
 #!/usr/bin/env python3
 try:
     import google.generativeai as genai
+    from google.generativeai import caching
+    from google.api_core import exceptions as google_exceptions
     GOOGLE_AI_AVAILABLE = True
+    # Quota, overload and timeout errors are worth another attempt; invalid requests are not
+    RETRYABLE_AI_ERRORS = (google_exceptions.ResourceExhausted, google_exceptions.ServiceUnavailable,
+                           google_exceptions.DeadlineExceeded, google_exceptions.InternalServerError,
+                           TimeoutError, ConnectionError)
 except ImportError:
     GOOGLE_AI_AVAILABLE = False
     genai = None
+    caching = None
+    RETRYABLE_AI_ERRORS = (TimeoutError, ConnectionError)
 
+import concurrent.futures
+import hashlib
+import json
+import random
+import threading
+import time
+
+from src.change_utils import format_change_line
 from src.config import logger, GOOGLE_AI_MODEL
+from src.metrics_utils import metrics
+
+# Bump whenever the prompts in generate_ai_description change, so cached summaries are not reused
+PROMPT_VERSION = 3
+
+# Part of the summary cache key: per-tag summaries (two-phase prompt) and batched summaries
+# (single structured prompt, see generate_batch_ai_descriptions) are cached separately
+SUMMARY_MODE_PER_TAG = 'per-tag'
+SUMMARY_MODE_BATCHED = 'batched'
+
+MAX_AI_BACKOFF_SECONDS = 60.0
+# How long a partial batch waits for more releases before it is sent (batched mode only)
+AI_BATCH_LINGER_SECONDS = 2.0
+WRITING_CACHE_TTL_SECONDS = 6 * 3600
+# Smallest content Gemini accepts for explicit context caching on gemini-2.5-pro
+MIN_CACHED_CONTENT_TOKENS = 4096
+
+# Static part of the writing prompt; sent as the writing model's system instruction (see initialize_writing_model)
+WRITING_INSTRUCTIONS = """Changelog posts announce new features and functionalities in our (Keboola) platform.
+Write concise "changelog" posts based on the changes in the message.
+
+The post should contain following sections:
+- Title (this is also displayed in in platform notifications)
+  - It should be short, poignant and concise. Ideally attracting attention for click.
+- Excerpt - a short sentence that describes what is the feature about.
+  - It should be short and capture the main announcement of the feature.
+  - It is also displayed in the detail of the post, so it should not duplicate with the initial sentence in the detail. Rather, it should summarise the post detail
+- Post detail
+  - These are couple of paragraphs describing what the feature is about.
+  - It should not be too chatty, but capture the main features and pointing out the value.
+  - It should be catchy, but not overly informal.
+
+Rules:
+- Start directly with the content
+- Do not include any introductory or closing comments
+- Do not include markdown formatting instructions
+- Do not use code blocks or markdown formatting
+
+Try to match the style and structure based on the bellow examples:
+# Title and excerpt examples
+---
+## Buffer API Deprecation & Migration to Data Streams
+We are announcing the deprecation of the Buffer API and encouraging users to migrate to the new Data Streams feature for improved performance and reliability.
+---
+## Faster, Smarter CDC Components—MySQL CDC Connector Now Generally Available
+Our MySQL Change Data Capture (CDC) component is now generally available, featuring column masks, filters, resumable snapshots, and improved performance for faster, more reliable data replication.
+---
+## Multiple Schedules per Flow
+The recent update to Flows introduces a frequently requested feature: the ability to set multiple schedules per flow.
+---
+## Change of Primary Key in Table "kbc_snowflake_stats" to Support Native Data Types
+We want to inform you about an upcoming change to the primary key in the table "kbc_snowflake_stats," which is part of the Telemetry Data extractor.
+---
+## Important Update on Disabling the MLflow Beta in Keboola
+We've updated the information regarding the MLflow Beta feature. Please read further for important details.
+# Post Detail examples (w title)
+# Keboola Platform Changelog
+---
+## Buffer API Deprecation & Migration to Data Streams
+We would like to inform you that our Buffer API is being deprecated as part of our commitment to providing you with the best tools and services. Effective March 1, 2025, the Buffer API will no longer be available.
+To ensure a seamless transition, we are introducing Data Streams, a powerful and improved service designed to enhance your data integration experience.
+### Why the change?
+- **Enhanced Performance:** Faster and more reliable data streaming.
+- **Improved Functionality:** Supports more use cases with advanced features.
+- **Streamlined Experience:** Fresh UI with a more intuitive and flexible integration process.
+### How to migrate:
+We've created a migration tool to help you move current Buffer API endpoints to Data Streams quickly and easily.
+### What you need to do:
+1. **Manually migrate existing Buffer API endpoint to Data Streams:**
+   - Create new Data Streams, copy the stream URL, and replace the current Buffer API endpoint within your integration with it.
+2. **Contact our support team:**
+   - We will run a script to migrate old Buffer API endpoints to new Data Streams so you can just copy-paste the Data Stream URL and replace the current Buffer API endpoint within your integration with it.
+Our support team is here to help you every step of the way. If you have any questions or concerns about the migration, feel free to reach out to us.
+Thank you for your understanding and for being a valued part of the Keboola community. We're excited for you to experience the benefits of Data Streams!
+---
+## Faster, Smarter CDC Components—MySQL CDC Connector Now Generally Available
+Our MySQL Change Data Capture (CDC) component is moving to General Availability (GA), featuring column masks, filters, resumable snapshots, and improved performance for faster, more reliable data replication.
+### New Features:
+- **Resumable Snapshots:** Enhances resiliency with partially resumable snapshots, allowing the connector to recover from failures during the snapshot process. If a failure occurs, progress is saved, and the process resumes from the last known position. The smallest resumable unit is a table. In Append Mode, duplicates may occur, requiring downstream handling.
+- **Column Masks:**
+  - **Length Mask:** Replaces string values with `*` characters, masking the data length.
+  - **Hash Mask:** Hashes string data using algorithms such as SHA-256, ensuring data privacy while preserving referential integrity.
+- **Column Filters:** Easily include or exclude specific columns in the CDC process using regex-based filtering.
+- **Debezium Upgrade:** We have upgraded to the newest version of Debezium.
+We look forward to your feedback as you explore these enhancements!
+---
+## Multiple Schedules per Flow
+The recent update to Flows introduces a frequently requested feature: the ability to set multiple schedules per flow.
+This enhancement provides greater flexibility in managing your data pipelines, allowing you to define various execution times and frequencies within a single flow.
+---
+## Change of Primary Key in Table "kbc_snowflake_stats" to Support Native Data Types
+We want to inform you about an upcoming change to the primary key in the table `kbc_snowflake_stats`, which is part of the Telemetry Data extractor.
+This change aims to support native data types, enhancing the efficiency and compatibility of your data operations.
+Please review your workflows and adjust any dependencies that may be affected by this change.
+---
+## Important Update on Disabling the MLflow Beta in Keboola
+As announced two weeks ago, we've had to disable the MLflow Beta due to issues with model deployment that were impacting usability and overall performance. To prevent further disruption, we've decided to pause the feature for now.
+However, contrary to our previous message, we now need to make you aware that all registered models will be permanently deleted. To avoid any loss, please download your models directly from the MLflow server by December 31, 2024.
+We sincerely apologize for any inconvenience this may cause. If you have questions or need assistance, please don't hesitate to submit a support ticket—we'll be ready to help.
+Thank you for your understanding and patience!
+"""
 
 
 def initialize_google_ai_client(api_key=None):
@@ -34,11 +151,92 @@ def initialize_google_ai_client(api_key=None):
         return None
 
 
-def generate_ai_description(google_ai_model, repo_name, previous_tag, current_tag, changes):
-    """Generate AI description for release notes."""
+def initialize_writing_model(google_ai_model):
+    """
+    Create the model used for the writing prompt with WRITING_INSTRUCTIONS as its system instruction.
+    Uses Gemini cached content, which stores the instructions once for the whole run, only when they reach
+    MIN_CACHED_CONTENT_TOKENS (checked with count_tokens). The current instructions are shorter, so they are sent
+    as a plain system instruction: Gemini still receives and bills them with every request, and only its implicit
+    prefix caching can discount the repeated prefix. Returns None if no model can be created.
+    """
+    if google_ai_model is None:
+        return None
+
+    try:
+        instruction_tokens = google_ai_model.count_tokens(WRITING_INSTRUCTIONS).total_tokens
+    except Exception as e:
+        logger.info(f"Could not count the writing instruction tokens ({e}), not caching them")
+        instruction_tokens = 0
+
+    if instruction_tokens < MIN_CACHED_CONTENT_TOKENS:
+        logger.info(f"Writing instructions have {instruction_tokens} tokens, below the {MIN_CACHED_CONTENT_TOKENS} "
+                    f"tokens needed for context caching; sending them as a system instruction with every request")
+    else:
+        try:
+            cached_content = caching.CachedContent.create(
+                model=google_ai_model.model_name,
+                display_name='release-notes-writing-instructions',
+                system_instruction=WRITING_INSTRUCTIONS,
+                ttl=WRITING_CACHE_TTL_SECONDS,
+            )
+            logger.info(f"Writing instructions cached as {cached_content.name} "
+                        f"({cached_content.usage_metadata.total_token_count} tokens)")
+            return genai.GenerativeModel.from_cached_content(cached_content)
+        except Exception as e:
+            logger.info(f"Context caching not available ({e}), sending writing instructions as a system instruction "
+                        f"with every request")
+
+    try:
+        return genai.GenerativeModel(GOOGLE_AI_MODEL, system_instruction=WRITING_INSTRUCTIONS)
+    except Exception as e:
+        logger.warning(f"Error creating writing model, instructions will be sent with every release: {e}")
+        return None
+
+
+def release_writing_model(writing_model) -> None:
+    """Delete the cached content of a writing model created by initialize_writing_model, if any."""
+    cached_content_name = getattr(writing_model, 'cached_content', None)
+    if not cached_content_name:
+        return
+    try:
+        caching.CachedContent.get(cached_content_name).delete()
+    except Exception as e:
+        logger.warning(f"Error deleting cached writing instructions {cached_content_name}: {e}")
+
+
+def summary_cache_key(repo_name, previous_tag, current_tag, changes, mode=SUMMARY_MODE_PER_TAG):
+    """
+    Hash of everything that determines an AI summary: model, prompt version, summary mode
+    (SUMMARY_MODE_PER_TAG or SUMMARY_MODE_BATCHED), repo, tag range and change titles.
+    """
+    key_data = {
+        'model': GOOGLE_AI_MODEL,
+        'prompt_version': PROMPT_VERSION,
+        'mode': mode,
+        'repo': repo_name,
+        'range': [previous_tag, current_tag],
+        'titles': [change.title for change in changes],
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def generate_ai_description(google_ai_model, repo_name, previous_tag, current_tag, changes, cache=None,
+                            writing_model=None):
+    """
+    Generate AI description for release notes.
+    If a summary cache (SQLiteCache) is given, identical change sets are summarized only once.
+    writing_model (see initialize_writing_model) carries WRITING_INSTRUCTIONS, so the prompt only holds the analysis.
+    """
+    cache_key = summary_cache_key(repo_name, previous_tag, current_tag, changes) if cache is not None else None
+    if cache_key:
+        cached_description = cache.get(cache_key)
+        if cached_description is not None:
+            logger.info(f"Using cached AI description for {repo_name} {previous_tag}...{current_tag}")
+            return cached_description
+
     try:
         # Format the changes as a readable list
-        changes_list = "\n".join([f"- {change}" for change in changes])
+        changes_list = "\n".join(format_change_line(change) for change in changes)
 
         # Create GitHub comparison URL
         github_compare_url = f"https://github.com/keboola/{repo_name}/compare/{previous_tag}...{current_tag}"
@@ -81,94 +279,338 @@ def generate_ai_description(google_ai_model, repo_name, previous_tag, current_ta
 
         # Phase 2: Generate release notes
         writing_prompt = f"""
-        Changelog posts announce new features and functionalities in our (Keboola) platform. 
         Write concise "changelog" posts based on these changes:
         {analysis}
-
-        The post should contain following sections:
-        - Title (this is also displayed in in platform notifications)
-          - It should be short, poignant and concise. Ideally attracting attention for click.
-        - Excerpt - a short sentence that describes what is the feature about.
-          - It should be short and capture the main announcement of the feature.
-          - It is also displayed in the detail of the post, so it should not duplicate with the initial sentence in the detail. Rather, it should summarise the post detail
-        - Post detail
-          - These are couple of paragraphs describing what the feature is about.
-          - It should not be too chatty, but capture the main features and pointing out the value.
-          - It should be catchy, but not overly informal.
-
-        Rules:
-        - Start directly with the content
-        - Do not include any introductory or closing comments
-        - Do not include markdown formatting instructions
-        - Do not use code blocks or markdown formatting
-
-        Try to match the style and structure based on the bellow examples:
-        # Title and excerpt examples
-        ---
-        ## Buffer API Deprecation & Migration to Data Streams
-        We are announcing the deprecation of the Buffer API and encouraging users to migrate to the new Data Streams feature for improved performance and reliability.
-        ---
-        ## Faster, Smarter CDC Components—MySQL CDC Connector Now Generally Available
-        Our MySQL Change Data Capture (CDC) component is now generally available, featuring column masks, filters, resumable snapshots, and improved performance for faster, more reliable data replication.
-        ---
-        ## Multiple Schedules per Flow
-        The recent update to Flows introduces a frequently requested feature: the ability to set multiple schedules per flow.
-        ---
-        ## Change of Primary Key in Table "kbc_snowflake_stats" to Support Native Data Types
-        We want to inform you about an upcoming change to the primary key in the table "kbc_snowflake_stats," which is part of the Telemetry Data extractor.
-        ---
-        ## Important Update on Disabling the MLflow Beta in Keboola
-        We've updated the information regarding the MLflow Beta feature. Please read further for important details.
-        # Post Detail examples (w title)
-        # Keboola Platform Changelog
-        ---
-        ## Buffer API Deprecation & Migration to Data Streams
-        We would like to inform you that our Buffer API is being deprecated as part of our commitment to providing you with the best tools and services. Effective March 1, 2025, the Buffer API will no longer be available.
-        To ensure a seamless transition, we are introducing Data Streams, a powerful and improved service designed to enhance your data integration experience.
-        ### Why the change?
-        - **Enhanced Performance:** Faster and more reliable data streaming.
-        - **Improved Functionality:** Supports more use cases with advanced features.
-        - **Streamlined Experience:** Fresh UI with a more intuitive and flexible integration process.
-        ### How to migrate:
-        We've created a migration tool to help you move current Buffer API endpoints to Data Streams quickly and easily.
-        ### What you need to do:
-        1. **Manually migrate existing Buffer API endpoint to Data Streams:**
-           - Create new Data Streams, copy the stream URL, and replace the current Buffer API endpoint within your integration with it.
-        2. **Contact our support team:**
-           - We will run a script to migrate old Buffer API endpoints to new Data Streams so you can just copy-paste the Data Stream URL and replace the current Buffer API endpoint within your integration with it.
-        Our support team is here to help you every step of the way. If you have any questions or concerns about the migration, feel free to reach out to us.
-        Thank you for your understanding and for being a valued part of the Keboola community. We're excited for you to experience the benefits of Data Streams!
-        ---
-        ## Faster, Smarter CDC Components—MySQL CDC Connector Now Generally Available
-        Our MySQL Change Data Capture (CDC) component is moving to General Availability (GA), featuring column masks, filters, resumable snapshots, and improved performance for faster, more reliable data replication.
-        ### New Features:
-        - **Resumable Snapshots:** Enhances resiliency with partially resumable snapshots, allowing the connector to recover from failures during the snapshot process. If a failure occurs, progress is saved, and the process resumes from the last known position. The smallest resumable unit is a table. In Append Mode, duplicates may occur, requiring downstream handling.
-        - **Column Masks:**
-          - **Length Mask:** Replaces string values with `*` characters, masking the data length.
-          - **Hash Mask:** Hashes string data using algorithms such as SHA-256, ensuring data privacy while preserving referential integrity.
-        - **Column Filters:** Easily include or exclude specific columns in the CDC process using regex-based filtering.
-        - **Debezium Upgrade:** We have upgraded to the newest version of Debezium.
-        We look forward to your feedback as you explore these enhancements!
-        ---
-        ## Multiple Schedules per Flow
-        The recent update to Flows introduces a frequently requested feature: the ability to set multiple schedules per flow.
-        This enhancement provides greater flexibility in managing your data pipelines, allowing you to define various execution times and frequencies within a single flow.
-        ---
-        ## Change of Primary Key in Table "kbc_snowflake_stats" to Support Native Data Types
-        We want to inform you about an upcoming change to the primary key in the table `kbc_snowflake_stats`, which is part of the Telemetry Data extractor.
-        This change aims to support native data types, enhancing the efficiency and compatibility of your data operations.
-        Please review your workflows and adjust any dependencies that may be affected by this change.
-        ---
-        ## Important Update on Disabling the MLflow Beta in Keboola
-        As announced two weeks ago, we've had to disable the MLflow Beta due to issues with model deployment that were impacting usability and overall performance. To prevent further disruption, we've decided to pause the feature for now.
-        However, contrary to our previous message, we now need to make you aware that all registered models will be permanently deleted. To avoid any loss, please download your models directly from the MLflow server by December 31, 2024.
-        We sincerely apologize for any inconvenience this may cause. If you have questions or need assistance, please don't hesitate to submit a support ticket—we'll be ready to help.
-        Thank you for your understanding and patience!
         """
+        if writing_model is None:
+            # Without a writing model the instructions are sent with every release
+            writing_model = google_ai_model
+            writing_prompt = WRITING_INSTRUCTIONS + writing_prompt
 
         # Generate release notes with Gemini
-        response = google_ai_model.generate_content(writing_prompt)
-        return response.text
+        response = writing_model.generate_content(writing_prompt)
+        description = response.text
+
+        if cache_key and description:
+            cache.set(cache_key, description)
+        return description
 
     except Exception as e:
-        raise e
\ No newline at end of file
+        raise e
+
+
+def release_key(repo_name, current_tag):
+    """Key of a release in batched requests and responses."""
+    return f"{repo_name}/{current_tag}"
+
+
+def generate_batch_ai_descriptions(google_ai_model, releases, writing_model=None):
+    """
+    Summarize several releases in one structured request.
+    releases is a list of (repo_name, previous_tag, current_tag, changes) tuples; the response is a JSON
+    object with one changelog post per release_key. Returns the posts by release key; raises ValueError
+    if the response cannot be parsed, releases missing from the response are left out.
+    """
+    keys = [release_key(repo_name, current_tag) for repo_name, _, current_tag, _ in releases]
+    sections = []
+    for key, (repo_name, previous_tag, current_tag, changes) in zip(keys, releases):
+        changes_list = "\n".join(format_change_line(change) for change in changes)
+        sections.append(f"""
+        Release {key}
+        Compare URL: https://github.com/keboola/{repo_name}/compare/{previous_tag}...{current_tag}
+        Changes:
+        {changes_list}
+        """)
+
+    prompt = f"""
+    Write one concise "changelog" post for each of the releases below, returned under the release's key.
+    Base each post only on the changes that affect data processing (how the main python code works).
+    Ignore CI/CD, docs, tests, builds, internal scripts, the developer portal, commit authors and timestamps.
+    {''.join(sections)}
+    """
+    if writing_model is None:
+        # Without a writing model the instructions are sent with every request
+        writing_model = google_ai_model
+        prompt = WRITING_INSTRUCTIONS + prompt
+
+    generation_config = {
+        'response_mime_type': 'application/json',
+        'response_schema': {
+            'type': 'object',
+            'properties': {key: {'type': 'string'} for key in keys},
+            'required': keys,
+        },
+    }
+    response = writing_model.generate_content(prompt, generation_config=generation_config)
+    try:
+        descriptions = json.loads(response.text)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Unparsable batched AI response: {e}") from e
+    if not isinstance(descriptions, dict):
+        raise ValueError("Batched AI response is not a JSON object")
+    return {key: descriptions[key] for key in keys
+            if isinstance(descriptions.get(key), str) and descriptions[key].strip()}
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate_per_minute: float, capacity: int = 1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is refilled if needed. Returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimitedModel:
+    """
+    Wrapper of a Gemini model with the generate_content() interface used by generate_ai_description.
+    Every call takes a token from the shared bucket, has a timeout and is retried on transient errors.
+    """
+
+    def __init__(self, model, limiter: TokenBucket, timeout: float = 120.0, max_retries: int = 3,
+                 backoff_seconds: float = 2.0, name: str = 'gemini'):
+        self.model = model
+        self.limiter = limiter
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.name = name
+        self.calls = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self.latency_seconds = 0.0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+
+    def _record_usage(self, response, latency: float) -> None:
+        """Log and accumulate the token counts reported for one call."""
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+        cached_tokens = getattr(usage, 'cached_content_token_count', 0) or 0
+        output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+        logger.info(f"Gemini {self.name} call: {prompt_tokens} input tokens ({cached_tokens} cached), "
+                    f"{output_tokens} output tokens, {latency:.1f}s")
+        with self._lock:
+            self.latency_seconds += latency
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+            self.output_tokens += output_tokens
+
+    def generate_content(self, prompt, **kwargs):
+        """Send one prompt, retrying transient failures with full-jitter exponential backoff."""
+        attempt = 0
+        while True:
+            waited = self.limiter.acquire()
+            with self._lock:
+                self.calls += 1
+                self.throttled_seconds += waited
+            # Structured (JSON schema) requests are the batched summaries
+            stage = 'ai.batch' if 'generation_config' in kwargs else f'ai.{self.name}'
+            try:
+                started = time.monotonic()
+                with metrics.timer(stage):
+                    response = self.model.generate_content(prompt, request_options={'timeout': self.timeout}, **kwargs)
+                self._record_usage(response, time.monotonic() - started)
+                return response
+            except RETRYABLE_AI_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(0, min(MAX_AI_BACKOFF_SECONDS, self.backoff_seconds * 2 ** attempt))
+                logger.warning(f"Gemini request failed ({e}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                with self._lock:
+                    self.retries += 1
+                attempt += 1
+                time.sleep(delay)
+
+
+class AISummarizer:
+    """
+    AI summarization stage: summaries are generated in a dedicated worker pool while the
+    component jobs keep fetching from GitHub.
+    Requests for the same repository, tag range and changes share one future (components of
+    one repository release the same tags), and summarization stops after
+    max_consecutive_failures summaries in a row have failed.
+    With batch_size > 1, up to batch_size releases (from any repository) are summarized in one
+    structured request; releases missing from a batched response fall back to per-tag calls.
+    """
+
+    def __init__(self, google_ai_model, cache=None, max_workers: int = 4, requests_per_minute: int = 60,
+                 timeout: float = 120.0, max_retries: int = 3, max_consecutive_failures: int = 5,
+                 writing_model=None, batch_size: int = 1):
+        limiter = TokenBucket(requests_per_minute, capacity=max_workers)
+        self.model = RateLimitedModel(google_ai_model, limiter, timeout=timeout, max_retries=max_retries,
+                                      name='analysis')
+        self.writing_model = None
+        if writing_model is not None:
+            self.writing_model = RateLimitedModel(writing_model, limiter, timeout=timeout, max_retries=max_retries,
+                                                  name='writing')
+        self.cache = cache
+        self.max_consecutive_failures = max_consecutive_failures
+        self.requests = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.batch_size = batch_size
+        self.batches = 0
+        self.batch_fallbacks = 0
+        self._futures = {}
+        self._batch = []
+        self._batch_timer = None
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-summary')
+
+    @property
+    def disabled(self) -> bool:
+        return self.consecutive_failures >= self.max_consecutive_failures
+
+    def submit(self, repo_name, previous_tag, current_tag, changes) -> concurrent.futures.Future:
+        """Schedule a summary; the future resolves to the description or None if it could not be generated."""
+        key = summary_cache_key(repo_name, previous_tag, current_tag, changes)
+        with self._lock:
+            self.requests += 1
+            future = self._futures.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            if self.disabled:
+                future = concurrent.futures.Future()
+                future.set_result(None)
+                return future
+            if self.batch_size <= 1:
+                future = self._executor.submit(self._summarize, repo_name, previous_tag, current_tag, changes)
+                self._futures[key] = future
+                return future
+
+            future = concurrent.futures.Future()
+            self._futures[key] = future
+            self._batch.append((key, (repo_name, previous_tag, current_tag, changes), future))
+            if len(self._batch) >= self.batch_size:
+                self._flush_batch_locked()
+            elif self._batch_timer is None:
+                # A partial batch is sent after a short wait, so no job waits for releases that never come
+                self._batch_timer = threading.Timer(AI_BATCH_LINGER_SECONDS, self._flush_batch)
+                self._batch_timer.daemon = True
+                self._batch_timer.start()
+            return future
+
+    def _flush_batch(self) -> None:
+        with self._lock:
+            self._flush_batch_locked()
+
+    def _flush_batch_locked(self) -> None:
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        if self._batch:
+            batch, self._batch = self._batch, []
+            self._executor.submit(self._summarize_batch, batch)
+
+    def _record_result(self, description) -> None:
+        with self._lock:
+            if description:
+                self.consecutive_failures = 0
+            else:
+                self.failures += 1
+                self.consecutive_failures += 1
+                if self.disabled:
+                    logger.info(f"AI description generation failed {self.consecutive_failures} times in a row - "
+                                f"disabling for subsequent tags")
+
+    def _summarize(self, repo_name, previous_tag, current_tag, changes):
+        # Summaries queued before the failure limit was reached are skipped
+        if self.disabled:
+            return None
+        try:
+            description = generate_ai_description(self.model, repo_name, previous_tag, current_tag, changes,
+                                                  cache=self.cache, writing_model=self.writing_model)
+        except Exception as e:
+            logger.warning(f"AI description generation failed for {repo_name} {previous_tag}...{current_tag}: {e}")
+            description = None
+
+        self._record_result(description)
+        return description
+
+    def _summarize_batch(self, batch) -> None:
+        """Summarize a batch in one request; cached releases are skipped, missing ones are summarized per tag."""
+        try:
+            # Only summaries written by the batched prompt are reused here; per-tag ones have their own key
+            pending = []
+            for _, release, future in batch:
+                key = summary_cache_key(*release, mode=SUMMARY_MODE_BATCHED)
+                cached_description = self.cache.get(key) if self.cache is not None else None
+                if cached_description is not None:
+                    logger.info(f"Using cached AI description for {release[0]} {release[1]}...{release[2]}")
+                    future.set_result(cached_description)
+                else:
+                    pending.append((key, release, future))
+
+            descriptions = {}
+            if len(pending) > 1 and not self.disabled:
+                try:
+                    descriptions = generate_batch_ai_descriptions(self.model, [release for _, release, _ in pending],
+                                                                  writing_model=self.writing_model)
+                    with self._lock:
+                        self.batches += 1
+                    logger.info(f"Batched AI request summarized {len(descriptions)}/{len(pending)} releases")
+                except Exception as e:
+                    logger.warning(f"Batched AI request for {len(pending)} releases failed, "
+                                   f"falling back to per-tag requests: {e}")
+
+            for key, release, future in pending:
+                description = descriptions.get(release_key(release[0], release[2]))
+                if description:
+                    self._record_result(description)
+                    if self.cache is not None:
+                        self.cache.set(key, description)
+                else:
+                    if len(pending) > 1:
+                        with self._lock:
+                            self.batch_fallbacks += 1
+                    description = self._summarize(*release)
+                future.set_result(description)
+        except Exception as e:
+            logger.error(f"Error summarizing AI batch: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    def summary(self) -> str:
+        """One-line usage summary for the final log."""
+        models = [model for model in (self.model, self.writing_model) if model is not None]
+        usage = ", ".join(
+            f"{model.name}: {model.calls} calls, {model.prompt_tokens} input tokens "
+            f"({model.cached_tokens} cached), {model.output_tokens} output tokens, "
+            f"{model.latency_seconds / max(model.calls, 1):.1f}s avg latency"
+            for model in models
+        )
+        batches = (f"{self.batches} batched requests, {self.batch_fallbacks} per-tag fallbacks, "
+                   if self.batch_size > 1 else "")
+        return (f"{self.requests} summaries requested, {self.coalesced} coalesced, {self.failures} failed, {batches}"
+                f"{sum(model.retries for model in models)} retries, "
+                f"{sum(model.throttled_seconds for model in models):.1f}s waiting for the rate limit; {usage}")
+
+    def close(self) -> None:
+        """Wait for the scheduled summaries, stop the worker pool and release the cached writing instructions."""
+        self._flush_batch()
+        self._executor.shutdown(wait=True)
+        if self.writing_model is not None:
+            release_writing_model(self.writing_model.model)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Persistent local caches backed by SQLite, and small caches kept in the Keboola state file.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Optional
+from src.config import logger
+
+
+class SQLiteCache:
+    """
+    Key-value cache stored in a single SQLite file.
+    Values are stored as zlib-compressed JSON. When the total stored size exceeds
+    max_size_bytes, the least recently used entries are evicted. Entries older than
+    ttl_seconds (if set) are treated as missing. The cache is thread-safe.
+    """
+
+    def __init__(self, path: str, max_size_bytes: int = 64 * 1024 * 1024, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_size_bytes = max_size_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+        self._connection.commit()
+        self._size = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        logger.info(f"Opened cache {path} ({self._size} bytes)")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if it is not cached."""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute("SELECT value, size, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            if self.ttl_seconds is not None and now - row[2] > self.ttl_seconds:
+                self._connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._connection.commit()
+                self._size -= row[1]
+                self.misses += 1
+                return None
+
+            self._connection.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value under key."""
+        blob = zlib.compress(json.dumps(value, default=str).encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            previous = self._connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now)
+            )
+            self._size += len(blob) - (previous[0] if previous else 0)
+            if self._size > self.max_size_bytes:
+                self._evict()
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache is below 90% of its size limit."""
+        target = self.max_size_bytes * 0.9
+        evicted = 0
+        rows = self._connection.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if self._size <= target:
+                break
+            self._connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._size -= size
+            evicted += 1
+        logger.info(f"Evicted {evicted} entries from cache {self.path}")
+
+    def close(self) -> None:
+        """Log hit/miss statistics and close the database."""
+        with self._lock:
+            logger.info(f"Cache {self.path}: {self.hits} hits, {self.misses} misses, {self._size} bytes")
+            self._connection.close()
+
+
+class StateCache:
+    """
+    Small key-value cache kept in the Keboola state file, which (unlike the data directory) survives between runs.
+    Entries are grouped by slot(key): storing a key replaces the entry of its slot, so the cache holds at most one
+    entry per slot (e.g. per repository) instead of growing with every outdated key. `entries` is the
+    JSON-serializable {slot: {'key': key, 'value': value}} map written back to the state file.
+    """
+
+    def __init__(self, name: str, entries: Optional[Dict[str, dict]] = None,
+                 slot: Optional[Callable[[str], str]] = None):
+        self.name = name
+        self.slot = slot or (lambda key: key)
+        self.entries = {slot_name: entry for slot_name, entry in (entries or {}).items()
+                        if isinstance(entry, dict) and 'key' in entry and 'value' in entry}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        logger.info(f"Loaded cache {name} from state ({len(self.entries)} entries)")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if it is not cached."""
+        with self._lock:
+            entry = self.entries.get(self.slot(key))
+            if entry is None or entry['key'] != key:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry['value']
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value under key, replacing the entry of its slot."""
+        with self._lock:
+            self.entries[self.slot(key)] = {'key': key, 'value': value}
+
+    def close(self) -> None:
+        """Log hit/miss statistics; the entries stay available for the state file."""
+        with self._lock:
+            logger.info(f"Cache {self.name}: {self.hits} hits, {self.misses} misses, {len(self.entries)} entries")
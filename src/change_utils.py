@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Compaction of the change lists sent to the AI model.
+Changes that never affect data processing (bots, CI, docs, chores) are dropped, duplicate
+titles are merged, commit bodies are shortened and the list is cut to a token budget.
+The release notes themselves keep the full change list.
+"""
+import dataclasses
+import re
+import threading
+from typing import List, Optional
+
+from src.config import logger
+from src.models import Change
+
+# Matched against change titles (case insensitive)
+DEFAULT_IGNORE_TITLE_PATTERNS = [
+    r'^(chore|ci|docs?|tests?|build|style)(\([^)]*\))?!?:',
+    r'^bump \S+ from \S+ to \S+',
+    r'^merge branch ',
+    r'\[(skip ci|ci skip)\]',
+]
+# Matched against commit authors (case insensitive)
+DEFAULT_IGNORE_AUTHOR_PATTERNS = [
+    r'\[bot\]$',
+    r'^(dependabot|renovate)',
+]
+
+# Rough size of a token in characters, good enough for budgeting prompts
+CHARS_PER_TOKEN = 4
+MERGE_LINE_PATTERN = re.compile(r'^Merge pull request #\d+')
+
+
+def change_body(change: Change) -> str:
+    """Commit message without the merge line and the title, on a single line."""
+    lines = [line.strip() for line in change.commit_message.strip().split('\n')]
+    lines = [line for line in lines if line and line != change.title and not MERGE_LINE_PATTERN.match(line)]
+    return ' '.join(' '.join(lines).split())
+
+
+def format_change_line(change: Change) -> str:
+    """One compact prompt line per change: title, pull request number and the (shortened) body."""
+    line = f"- {change.title}"
+    if change.pr_number:
+        line += f" (#{change.pr_number})"
+    body = change_body(change)
+    if body:
+        line += f": {body}"
+    return line
+
+
+class ChangeCompactor:
+    """
+    Filters and shrinks change lists before they are summarized.
+    Thread-safe; counts what was removed across the run for the final log.
+    """
+
+    def __init__(self, ignore_title_patterns: Optional[List[str]] = None,
+                 ignore_author_patterns: Optional[List[str]] = None,
+                 max_body_chars: int = 300, token_budget: int = 4000):
+        title_patterns = DEFAULT_IGNORE_TITLE_PATTERNS if ignore_title_patterns is None else ignore_title_patterns
+        author_patterns = DEFAULT_IGNORE_AUTHOR_PATTERNS if ignore_author_patterns is None else ignore_author_patterns
+        self.ignore_title = re.compile('|'.join(f'(?:{p})' for p in title_patterns), re.IGNORECASE) \
+            if title_patterns else None
+        self.ignore_author = re.compile('|'.join(f'(?:{p})' for p in author_patterns), re.IGNORECASE) \
+            if author_patterns else None
+        self.max_body_chars = max_body_chars
+        self.token_budget = token_budget
+        self.changes_in = 0
+        self.ignored = 0
+        self.duplicates = 0
+        self.truncated = 0
+        self.over_budget = 0
+        self._lock = threading.Lock()
+
+    def is_ignored(self, change: Change) -> bool:
+        """True if the change matches an ignore rule."""
+        return bool((self.ignore_title and self.ignore_title.search(change.title)) or
+                    (self.ignore_author and self.ignore_author.search(change.author)))
+
+    def compact(self, changes: List[Change]) -> List[Change]:
+        """
+        Return the changes worth summarizing, in their original order.
+        Bodies longer than max_body_chars are cut, and changes past the token budget are dropped.
+        """
+        compacted = []
+        seen_titles = set()
+        ignored = duplicates = truncated = over_budget = 0
+        used_tokens = 0
+
+        for index, change in enumerate(changes):
+            if self.is_ignored(change):
+                ignored += 1
+                continue
+
+            title_key = ' '.join(change.title.lower().split())
+            if title_key in seen_titles:
+                duplicates += 1
+                continue
+            seen_titles.add(title_key)
+
+            body = change_body(change)
+            if len(body) > self.max_body_chars:
+                body = body[:self.max_body_chars].rstrip() + '...'
+                truncated += 1
+            change = dataclasses.replace(change, commit_message=f"{change.title}\n{body}" if body else change.title)
+
+            tokens = len(format_change_line(change)) // CHARS_PER_TOKEN + 1
+            if used_tokens + tokens > self.token_budget and compacted:
+                over_budget = len(changes) - index
+                break
+            used_tokens += tokens
+            compacted.append(change)
+
+        with self._lock:
+            self.changes_in += len(changes)
+            self.ignored += ignored
+            self.duplicates += duplicates
+            self.truncated += truncated
+            self.over_budget += over_budget
+
+        if len(compacted) < len(changes):
+            logger.info(f"Compacted {len(changes)} changes to {len(compacted)} for AI summary "
+                        f"({ignored} ignored, {duplicates} duplicate, {over_budget} over the token budget)")
+        return compacted
+
+    def summary(self) -> str:
+        """One-line summary for the final log."""
+        return (f"{self.changes_in} changes, {self.ignored} ignored, {self.duplicates} duplicate, "
+                f"{self.truncated} truncated, {self.over_budget} over the token budget")
@@ -1,8 +1,47 @@
 #!/usr/bin/env python3
 import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
 import requests
 from src.config import logger
 
+# Component identifiers in workflow files, matched in a single pass over the whole file.
+# Values must be on the same line as the key: KEY: value, KEY: "value", KEY: 'value'
+# The pattern is case sensitive and runs over lower-cased text, which lets the regex engine
+# skip ahead on the literal prefixes; values are then sliced from the original text.
+_IDENTIFIER_PATTERN = (
+    r'(?:kbc_developerportal_(?:(?P<vendor>vendor)|app|id)|app_name)'
+    r'[^\S\n]*:[^\S\n]*[\'"]?(?P<value>[a-zA-Z0-9._-]+)'
+)
+COMPONENT_IDENTIFIER_PATTERN = re.compile(_IDENTIFIER_PATTERN)
+# Used when lower-casing changes the text length (some non-ASCII characters), so offsets would not line up
+COMPONENT_IDENTIFIER_PATTERN_IGNORECASE = re.compile(_IDENTIFIER_PATTERN, re.IGNORECASE)
+
+
+def scan_component_identifiers(text: str) -> tuple[set, set]:
+    """
+    Scan workflow file content once and return (component names, vendors).
+    Component names come from KBC_DEVELOPERPORTAL_APP, KBC_DEVELOPERPORTAL_ID and APP_NAME,
+    vendors from KBC_DEVELOPERPORTAL_VENDOR (all case insensitive). GitHub Actions
+    expressions such as ${{ vars.APP }} never match the value pattern and are ignored.
+    """
+    component_names = set()
+    vendors = set()
+
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        matches = COMPONENT_IDENTIFIER_PATTERN.finditer(lowered)
+    else:
+        matches = COMPONENT_IDENTIFIER_PATTERN_IGNORECASE.finditer(text)
+
+    for match in matches:
+        value = text[match.start('value'):match.end('value')]
+        if match.group('vendor'):
+            vendors.add(value)
+        else:
+            component_names.add(value)
+    return component_names, vendors
+
 
 def get_component_name(repo):
     """Extract component names from workflow files.
@@ -37,30 +76,9 @@ def get_component_name(repo):
         for yml_file in yml_files:
             try:
                 file_content = yml_file.decoded_content.decode('utf-8')
-                
-                # Split content into lines to ensure we only match values on the same line
-                lines = file_content.split('\n')
-                
-                for line in lines:
-                    # Process only non-empty lines
-                    if not line.strip():
-                        continue
-                        
-                    # Find component identifiers - ensure values are on the same line
-                    # Match patterns like: KEY: value, KEY: "value", KEY: 'value'
-                    app_match = re.search(r'(?i)KBC_DEVELOPERPORTAL_APP\s*:\s*[\'"]?([a-zA-Z0-9._-]+)[\'"]?', line)
-                    id_match = re.search(r'(?i)KBC_DEVELOPERPORTAL_ID\s*:\s*[\'"]?([a-zA-Z0-9._-]+)[\'"]?', line)
-                    app_name_match = re.search(r'(?i)APP_NAME\s*:\s*[\'"]?([a-zA-Z0-9._-]+)[\'"]?', line)
-                    vendor_match = re.search(r'(?i)KBC_DEVELOPERPORTAL_VENDOR\s*:\s*[\'"]?([a-zA-Z0-9._-]+)[\'"]?', line)
-                    
-                    # Add component matches
-                    for match in [app_match, id_match, app_name_match]:
-                        if match and match.group(1) and not match.group(1).startswith('${{'):
-                            component_names.add(match.group(1))
-                    
-                    # Add vendor match
-                    if vendor_match and vendor_match.group(1) and not vendor_match.group(1).startswith('${{'):
-                        vendors.add(vendor_match.group(1))
+                file_component_names, file_vendors = scan_component_identifiers(file_content)
+                component_names.update(file_component_names)
+                vendors.update(file_vendors)
                 
             except Exception as e:
                 logger.warning(f"Error processing file {yml_file.path}: {e}")
@@ -176,19 +194,50 @@ def find_yml_files_in_directory(repo, directory_path, max_retries=1):
 
 
 
-def load_component_details():
-    """Get component details from Keboola Connection Storage API."""
+COMPONENTS_API_URL = "https://connection.keboola.com/v2/storage"
+
+# Component fields used by job collection, stage detection and table output
+COMPONENT_FIELDS = ('id', 'type', 'name', 'description', 'documentationUrl', 'flags')
+
+
+def _trim_component(component):
+    """Keep only the component fields the generator uses."""
+    return {field: component[field] for field in COMPONENT_FIELDS if field in component}
+
+
+def load_component_catalog(snapshot: Optional[Dict[str, Any]] = None, timeout=30) -> Optional[Dict[str, Any]]:
+    """
+    Get the component catalog from Keboola Connection Storage API as a snapshot
+    {'etag': ..., 'last_modified': ..., 'components': [...]} that can be stored between runs.
+    The request is revalidated against the previous snapshot with ETag/Last-Modified,
+    a 304 response reuses it and any failure falls back to it.
+    Returns None if the catalog could not be loaded and there is no previous snapshot.
+    """
     try:
-        # Use the Storage API to get all components
-        api_url = "https://connection.keboola.com/v2/storage"
+        headers = {}
+        if snapshot:
+            if snapshot.get('etag'):
+                headers['If-None-Match'] = snapshot['etag']
+            if snapshot.get('last_modified'):
+                headers['If-Modified-Since'] = snapshot['last_modified']
 
         # Make API request without authentication
-        response = requests.get(api_url)
+        response = requests.get(COMPONENTS_API_URL, headers=headers, timeout=timeout)
+
+        if response.status_code == 304 and snapshot:
+            logger.info(f"Component list not modified, using the stored snapshot ({len(snapshot['components'])} components)")
+            return snapshot
 
         # Check if the request was successful
         if response.status_code == 200:
             # Parse JSON response
-            return response.json().get('components')
+            components = [_trim_component(component) for component in response.json().get('components') or []]
+            logger.info(f"Downloaded component list ({len(components)} components)")
+            return {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'components': components
+            }
 
         else:
             logger.warning(f"Failed to retrieve components list: HTTP {response.status_code}")
@@ -197,8 +246,17 @@ def load_component_details():
     except Exception as e:
         logger.error(f"Error retrieving component details: {e}")
 
-    # Return empty list if failed
-    return []
+    if snapshot:
+        logger.warning(f"Using last good component list snapshot ({len(snapshot['components'])} components)")
+        return snapshot
+
+    return None
+
+
+def load_component_details(timeout=30):
+    """Get component details from Keboola Connection Storage API (empty list if they cannot be loaded)."""
+    catalog = load_component_catalog(timeout=timeout)
+    return catalog['components'] if catalog else []
 
 
 def determine_component_stage(component_details):
@@ -216,3 +274,52 @@ def determine_component_stage(component_details):
         return "PRIVATE"
     else:
         return "PRODUCTION(GA)"
+
+
+class ComponentRegistry:
+    """
+    Index of Keboola component details built once per run.
+    Provides constant-time lookups by component id (with the precomputed stage)
+    and lists of components by vendor and by type.
+    """
+
+    def __init__(self, components_details: Optional[List[Dict[str, Any]]]):
+        self._by_id = {}
+        self._stages = {}
+        self._by_vendor = defaultdict(list)
+        self._by_type = defaultdict(list)
+
+        for component in components_details or []:
+            component_id = component.get('id')
+            if not component_id:
+                continue
+
+            self._by_id[component_id] = component
+            self._stages[component_id] = determine_component_stage(component)
+            if '.' in component_id:
+                self._by_vendor[component_id.split('.', 1)[0]].append(component)
+            self._by_type[component.get('type')].append(component)
+
+        logger.info(f"Indexed {len(self._by_id)} components ({len(self._by_vendor)} vendors, {len(self._by_type)} types)")
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, component_id):
+        return component_id in self._by_id
+
+    def get(self, component_id: str) -> Optional[Dict[str, Any]]:
+        """Return component details for an id, or None if the component is unknown."""
+        return self._by_id.get(component_id)
+
+    def stage(self, component_id: str) -> Optional[str]:
+        """Return the precomputed stage (see determine_component_stage) for an id."""
+        return self._stages.get(component_id)
+
+    def by_vendor(self, vendor: str) -> List[Dict[str, Any]]:
+        """Return all components whose id starts with the given vendor prefix."""
+        return self._by_vendor.get(vendor, [])
+
+    def by_type(self, component_type: str) -> List[Dict[str, Any]]:
+        """Return all components of the given type (e.g. extractor, writer)."""
+        return self._by_type.get(component_type, [])
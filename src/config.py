@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 import os
 import logging
+import re
 import sys
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 # GitHub Configuration
@@ -36,6 +37,26 @@ class Configuration(BaseModel):
     google_ai_api_key: Optional[str] = None
     days_back: int = 7
     table_name: str = "component_releases"
+    metrics_table_name: str = "run_metrics"
+    max_workers: int = 4
+    github_max_concurrency: int = 8
+    github_request_timeout: int = 60
+    github_max_retries: int = 5
+    repository_discovery: str = "organization"
+    cache_dir: Optional[str] = None
+    compare_cache_max_mb: int = 64
+    blob_cache_max_mb: int = 32
+    ai_cache_max_mb: int = 16
+    ai_cache_ttl_days: int = 90
+    ai_max_workers: int = 4
+    ai_requests_per_minute: int = 60
+    ai_request_timeout: int = 120
+    ai_max_retries: int = 3
+    ai_batch_size: int = 1
+    ai_change_token_budget: int = 4000
+    ai_max_change_body_chars: int = 300
+    ai_ignore_title_patterns: Optional[List[str]] = None
+    ai_ignore_author_patterns: Optional[List[str]] = None
 
 
 def load_configuration(ci) -> Configuration:
@@ -73,6 +94,26 @@ def load_configuration(ci) -> Configuration:
         # Handle regular parameters
         config_data['days_back'] = params.get('days_back', 7)
         config_data['table_name'] = params.get('table_name', 'component_releases')
+        config_data['metrics_table_name'] = params.get('metrics_table_name', 'run_metrics')
+        config_data['max_workers'] = params.get('max_workers', 4)
+        config_data['github_max_concurrency'] = params.get('github_max_concurrency', 8)
+        config_data['github_request_timeout'] = params.get('github_request_timeout', 60)
+        config_data['github_max_retries'] = params.get('github_max_retries', 5)
+        config_data['repository_discovery'] = params.get('repository_discovery', 'organization')
+        config_data['cache_dir'] = params.get('cache_dir')
+        config_data['compare_cache_max_mb'] = params.get('compare_cache_max_mb', 64)
+        config_data['blob_cache_max_mb'] = params.get('blob_cache_max_mb', 32)
+        config_data['ai_cache_max_mb'] = params.get('ai_cache_max_mb', 16)
+        config_data['ai_cache_ttl_days'] = params.get('ai_cache_ttl_days', 90)
+        config_data['ai_max_workers'] = params.get('ai_max_workers', 4)
+        config_data['ai_requests_per_minute'] = params.get('ai_requests_per_minute', 60)
+        config_data['ai_request_timeout'] = params.get('ai_request_timeout', 120)
+        config_data['ai_max_retries'] = params.get('ai_max_retries', 3)
+        config_data['ai_batch_size'] = params.get('ai_batch_size', 1)
+        config_data['ai_change_token_budget'] = params.get('ai_change_token_budget', 4000)
+        config_data['ai_max_change_body_chars'] = params.get('ai_max_change_body_chars', 300)
+        config_data['ai_ignore_title_patterns'] = params.get('ai_ignore_title_patterns')
+        config_data['ai_ignore_author_patterns'] = params.get('ai_ignore_author_patterns')
         
         logger.info(f"Configuration data prepared: {list(config_data.keys())}")
         logger.info(f"Config data values: {config_data}")
@@ -80,7 +121,8 @@ def load_configuration(ci) -> Configuration:
         # Create configuration object
         config = Configuration(**config_data)
         
-        logger.info(f"Configuration loaded successfully: days_back={config.days_back}, table_name={config.table_name}")
+        logger.info(f"Configuration loaded successfully: days_back={config.days_back}, table_name={config.table_name}, "
+                    f"max_workers={config.max_workers}")
         return config
         
     except Exception as e:
@@ -101,6 +143,61 @@ def validate_configuration(config: Configuration) -> bool:
     
     if not config.table_name:
         issues.append("table_name cannot be empty")
+
+    if config.max_workers < 1:
+        issues.append("max_workers must be at least 1")
+
+    if config.github_max_concurrency < 1:
+        issues.append("github_max_concurrency must be at least 1")
+
+    if config.github_request_timeout <= 0:
+        issues.append("github_request_timeout must be positive")
+
+    if config.github_max_retries < 0:
+        issues.append("github_max_retries cannot be negative")
+
+    if config.repository_discovery not in ("search", "organization"):
+        issues.append("repository_discovery must be 'search' or 'organization'")
+
+    if config.compare_cache_max_mb < 0:
+        issues.append("compare_cache_max_mb cannot be negative")
+
+    if config.blob_cache_max_mb < 0:
+        issues.append("blob_cache_max_mb cannot be negative")
+
+    if config.ai_cache_max_mb < 0:
+        issues.append("ai_cache_max_mb cannot be negative")
+
+    if config.ai_cache_ttl_days <= 0:
+        issues.append("ai_cache_ttl_days must be positive")
+
+    if config.ai_max_workers < 1:
+        issues.append("ai_max_workers must be at least 1")
+
+    if config.ai_requests_per_minute <= 0:
+        issues.append("ai_requests_per_minute must be positive")
+
+    if config.ai_request_timeout <= 0:
+        issues.append("ai_request_timeout must be positive")
+
+    if config.ai_max_retries < 0:
+        issues.append("ai_max_retries cannot be negative")
+
+    if config.ai_batch_size < 1:
+        issues.append("ai_batch_size must be at least 1")
+
+    if config.ai_change_token_budget <= 0:
+        issues.append("ai_change_token_budget must be positive")
+
+    if config.ai_max_change_body_chars < 0:
+        issues.append("ai_max_change_body_chars cannot be negative")
+
+    for name in ('ai_ignore_title_patterns', 'ai_ignore_author_patterns'):
+        for pattern in getattr(config, name) or []:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                issues.append(f"{name} contains an invalid regular expression {pattern!r}: {e}")
     
     if issues:
         for issue in issues:
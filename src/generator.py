@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 import os
+import sys
 import datetime
+import threading
+import time
 import concurrent.futures
 from typing import Any, List
-import re
 
 from src.config import logger
-from src.github_graphql_utils import get_all_repositories_data_in_single_request, get_tags_in_period, get_changes_between_tags, get_repo_tags
-from src.component_utils import get_component_name, load_component_details, determine_component_stage
-from src.keboola_utils import detect_time_period_from_state, update_state_file, save_release_to_table
+from src.github_graphql_utils import get_all_repositories_data_in_single_request, get_tags_in_period, get_changes_between_tags, get_repo_tags, compare_many, RepositoryDiscoveryError, component_names_cache_slot
+from src.component_utils import get_component_name, load_component_catalog, ComponentRegistry
+from src.keboola_utils import detect_time_period_from_state, update_state_file, load_repository_watermarks, load_component_catalog_snapshot, load_component_names_snapshot, ReleaseTableWriter, save_run_metrics_to_table
+from src.metrics_utils import metrics
 from src.config import load_configuration, validate_configuration
-from src.ai_utils import initialize_google_ai_client, generate_ai_description
+from src.ai_utils import initialize_google_ai_client, initialize_writing_model, AISummarizer
+from src.cache_utils import SQLiteCache, StateCache
+from src.change_utils import ChangeCompactor
+from src.models import ReleaseEntry, RepoSnapshot, Tag, TagIndex
 from keboola.component import CommonInterface
 
 
@@ -19,10 +25,9 @@ class ReleaseNotesGenerator:
 
     def __init__(self, github_token: str, ci: CommonInterface):
         """Initialize generator with GitHub token and Keboola interface."""
-        # Always use the best available method (ultra-optimized GraphQL)
-        from src.github_graphql_utils import initialize_github_client as initialize_graphql_client
-        self.github = initialize_graphql_client(github_token)
-        
+        # Run metrics cover everything from the GitHub client initialization on
+        metrics.reset()
+
         # Initialize Keboola interface
         self.ci = ci
         self.organization = "keboola"
@@ -30,6 +35,12 @@ class ReleaseNotesGenerator:
         # Load configuration
         self.config = load_configuration(ci)
         
+        # Always use the best available method (ultra-optimized GraphQL over a pooled HTTP/2 connection)
+        from src.github_graphql_utils import initialize_github_client as initialize_graphql_client
+        self.github = initialize_graphql_client(github_token, max_concurrency=self.config.github_max_concurrency,
+                                                timeout=self.config.github_request_timeout,
+                                                max_retries=self.config.github_max_retries)
+        
         # Initialize Google AI client if available
         self.google_ai_model = initialize_google_ai_client(self.config.google_ai_api_key)
         
@@ -44,65 +55,123 @@ class ReleaseNotesGenerator:
         logger.info(
             f"Using date range: {self.start_date.strftime('%Y-%m-%d')} to {self.end_date.strftime('%Y-%m-%d')}")
         
+        # Per-repository watermarks (newest tag seen in previous runs)
+        self.repository_watermarks = load_repository_watermarks(ci)
+        
         # Initialize tracking for new releases
         self.new_releases = []
+        self.repositories = []
+        # False when repository discovery did not finish, the period start must then not move forward
+        self.discovery_complete = True
+        # Component catalog snapshot, revalidated every run and stored in the state file
+        self.component_catalog = None
+
+        # Shared state touched by worker threads in generate_timeline
+        self._failed_repos = set()
+        self._failed_repos_lock = threading.Lock()
+        self.table_writer = None
+
+        # Commit ranges resolved in batch, keyed by (repo name, base commit, head commit)
+        self._comparisons = {}
+
+        # TagIndex per repository name, shared by the components of a repository
+        self._tag_indexes = {}
+
+        # The Keboola data directory does not survive between runs, so the cross-run caches are only
+        # opened in a configured cache_dir; the small component name map is kept in the state file instead
+        self.cache_dir = self.config.cache_dir
+        if not self.cache_dir:
+            logger.info("No cache_dir configured, the commit range, workflow file and AI summary caches are disabled")
+        self.compare_cache = self._open_cache('compare.sqlite', self.config.compare_cache_max_mb)
+        self.ai_summary_cache = self._open_cache('ai_summaries.sqlite', self.config.ai_cache_max_mb,
+                                                 ttl_seconds=self.config.ai_cache_ttl_days * 24 * 3600)
+        self.blob_cache = self._open_cache('blobs.sqlite', self.config.blob_cache_max_mb)
+        self.component_names_cache = StateCache('component_names', load_component_names_snapshot(ci),
+                                                slot=component_names_cache_slot)
+
+        # AI summaries are generated in their own rate-limited worker pool from compacted change lists
+        self.change_compactor = ChangeCompactor(ignore_title_patterns=self.config.ai_ignore_title_patterns,
+                                                ignore_author_patterns=self.config.ai_ignore_author_patterns,
+                                                max_body_chars=self.config.ai_max_change_body_chars,
+                                                token_budget=self.config.ai_change_token_budget)
+        self.ai_summarizer = None
+        if self.google_ai_model:
+            self.ai_summarizer = AISummarizer(self.google_ai_model, cache=self.ai_summary_cache,
+                                              max_workers=self.config.ai_max_workers,
+                                              requests_per_minute=self.config.ai_requests_per_minute,
+                                              timeout=self.config.ai_request_timeout,
+                                              max_retries=self.config.ai_max_retries,
+                                              writing_model=initialize_writing_model(self.google_ai_model),
+                                              batch_size=self.config.ai_batch_size)
+
+    def _open_cache(self, file_name: str, max_size_mb: int, ttl_seconds=None):
+        """
+        Open a persistent cache in cache_dir; caching is skipped without cache_dir, if disabled (size 0)
+        or if the cache cannot be opened.
+        """
+        if not self.cache_dir:
+            return None
+        if max_size_mb <= 0:
+            logger.info(f"Cache {file_name} disabled")
+            return None
+        try:
+            return SQLiteCache(os.path.join(self.cache_dir, file_name), max_size_bytes=max_size_mb * 1024 * 1024,
+                               ttl_seconds=ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Could not open cache {file_name}, continuing without it: {e}")
+            return None
 
     def get_repositories_optimized(self):
         """Get repositories using the most optimized method (ultra-optimized single GraphQL request)."""
         logger.info("Using ultra-optimized single GraphQL request for all repositories")
         from src.github_graphql_utils import get_all_repositories_data_in_single_request
-        return get_all_repositories_data_in_single_request(self.github, self.organization)
+
+        # Repositories not pushed since the period start (or since a failed repository's watermark) have no new tags
+        pushed_since = min([self.start_date] + [watermark['date'] for watermark in self.repository_watermarks.values()
+                                                if watermark.get('commit') is None])
+        try:
+            return get_all_repositories_data_in_single_request(self.github, self.organization, self.repository_watermarks,
+                                                               discovery=self.config.repository_discovery,
+                                                               pushed_since=pushed_since,
+                                                               blob_cache=self.blob_cache,
+                                                               component_cache=self.component_names_cache)
+        except RepositoryDiscoveryError as e:
+            # Repositories fetched before the failure are still processed, but the state keeps the old period start
+            logger.error(f"Repository discovery incomplete, processing {len(e.repositories)} repositories "
+                         f"found before the failure: {e}")
+            self.discovery_complete = False
+            return e.repositories
 
     @staticmethod
-    def find_previous_tag(repo, tag, all_tags, organization):
+    def find_previous_tag(repo, tag, tag_index, organization):
         """
-        Find the previous tag for a given tag.
+        Find the previous tag for a given tag using the repository's TagIndex.
         Returns a tag object with name, commit, date, message, and url.
         """
-        tag_name = tag['name']
-        tag_date = tag['date']
+        tag_name = tag.name
 
         # Create fallback tag
-        fallback = {
-            'name': 'initial',
-            'commit': tag['commit'],
-            'date': tag_date - datetime.timedelta(days=1),
-            'message': 'Initial state',
-            'url': f"https://github.com/{organization}/{repo.name}/commit/{tag['commit']}"
-        }
+        fallback = Tag(
+            name='initial',
+            commit=tag.commit,
+            date=tag.date - datetime.timedelta(days=1),
+            message='Initial state',
+            url=f"https://github.com/{organization}/{repo.name}/commit/{tag.commit}"
+        )
 
         try:
-            # Sort tags by date (newest first)
-            sorted_tags = sorted(all_tags, key=lambda t: t['date'], reverse=True)
-
-            # Try to find semantically similar tag first (from same version family)
-            same_family_tags = []
-
-            # Check if the tag looks like semantic versioning (vX.Y.Z or X.Y.Z)
-            version_match = re.match(r'(v?\d+\.\d+)', tag_name)
-            if version_match:
-                # Get the family prefix (e.g., v1.2 or 1.2)
-                version_family = version_match.group(1)
-                logger.info(f"Looking for previous tag in version family {version_family} for tag {tag_name}")
-
-                # Find all tags from the same family
-                for t in sorted_tags:
-                    if t['name'] != tag_name and t['date'] < tag_date and t['name'].startswith(version_family):
-                        same_family_tags.append(t)
-
-                # Return the most recent tag from the same family
-                if same_family_tags:
-                    logger.info(
-                        f"Found semantic previous tag from same family: {same_family_tags[0]['name']} for tag {tag_name}")
-                    return same_family_tags[0]
+            # Try to find semantically similar tag first (from same major.minor version family)
+            previous_tag = tag_index.previous_in_family(tag)
+            if previous_tag:
+                logger.info(f"Found semantic previous tag from same family: {previous_tag.name} for tag {tag_name}")
+                return previous_tag
 
             # If no semantic match found, fall back to chronological order
             logger.info(f"No semantic previous tag found for {tag_name}, falling back to chronological order")
-
-            for t in sorted_tags:
-                if t['date'] < tag_date and t['name'] != tag_name:
-                    logger.info(f"Found chronological previous tag: {t['name']} for tag {tag_name}")
-                    return t
+            previous_tag = tag_index.previous(tag)
+            if previous_tag:
+                logger.info(f"Found chronological previous tag: {previous_tag.name} for tag {tag_name}")
+                return previous_tag
 
             # If no previous tag found, use fallback
             logger.info(f"No previous tag found for {tag_name}, using fallback")
@@ -112,6 +181,13 @@ class ReleaseNotesGenerator:
             logger.error(f"Error finding previous tag for {tag_name}: {e}")
             return fallback
 
+    def get_tag_index(self, repo, all_tags) -> TagIndex:
+        """Return the TagIndex of a repository, built once and shared by all its components."""
+        tag_index = self._tag_indexes.get(repo.name)
+        if tag_index is None:
+            tag_index = self._tag_indexes[repo.name] = TagIndex(all_tags)
+        return tag_index
+
     def collect_component_jobs(self) -> list[dict[str, Any]]:
         """
         Collect all valid components to process.
@@ -119,31 +195,40 @@ class ReleaseNotesGenerator:
         Note: Tag fetching is done in process_component_job for better parallelization.
         """
         logger.info("Collecting components to process...")
-        components_details = load_component_details()
+        self.component_catalog = load_component_catalog(load_component_catalog_snapshot(self.ci))
+        if self.component_catalog is None:
+            logger.error("Component catalog unavailable, no component jobs can be matched; the state will not move forward")
+        component_registry = ComponentRegistry(self.component_catalog['components'] if self.component_catalog else [])
         repos = self.get_repositories_optimized()
+        self.repositories = repos
         component_jobs = []
 
         for repo in repos:
             # Use pre-fetched component data if available, otherwise fetch it
-            if hasattr(repo, '_workflow_files'):
+            if isinstance(repo, RepoSnapshot):
                 logger.info(f"Using pre-fetched component data for {repo.name}")
                 # Use the GraphQL version of get_component_name that works with pre-fetched data
-                from src.github_graphql_utils import get_component_name as get_component_name_graphql
-                component_names = get_component_name_graphql(repo, repo._github_client_data)
+                from src.github_graphql_utils import resolve_component_names
+                component_names = resolve_component_names(repo, repo.github_client, self.component_names_cache)
             else:
                 logger.info(f"Fetching component data for {repo.name}")
                 component_names = get_component_name(repo)
             
             logger.info(f"Found component names for {repo.name}: {component_names}")
 
+            # Names resolved without all workflow texts may miss components, so the repository is retried next run
+            if not getattr(repo, 'blob_texts_complete', True):
+                logger.warning(f"Workflow files of {repo.name} were not all fetched, its watermark will not move")
+                self._mark_repo_failed(repo.name)
+
             # Track valid components count for this repo
             valid_components_count = 0
 
             # Check each component and add valid ones directly to component_jobs
             for component_name in component_names:
-                matched_component = next((c for c in components_details if c.get('id') == component_name), None)
+                matched_component = component_registry.get(component_name)
                 if matched_component:
-                    component_stage = determine_component_stage(matched_component)
+                    component_stage = component_registry.stage(component_name)
                     logger.info(f"Component {component_name} is in {component_stage} stage")
 
                     # Add directly to component_jobs
@@ -170,105 +255,139 @@ class ReleaseNotesGenerator:
         
         return component_jobs
 
-    def process_component_job(self, job: dict[str, Any]) -> list[dict[str, Any]]:
+    def plan_component_job(self, job: dict[str, Any]) -> list[tuple[Tag, Tag]]:
         """
-        Process a single component job.
-        This includes fetching tags (which is now done here in parallel) and processing them.
-        Returns a list of entries (release notes) created for this component.
+        Resolve the tags of a component job that fall into the processed period
+        together with their previous tags.
+        Returns a list of (tag, previous_tag) pairs; the list is also stored in job['releases'].
         """
         repo = job['repo']
         component_name = job['component_name']
-        component_details = job['component_details']
-        component_stage = job['component_stage']
 
-        logger.info(f"Starting processing for component {component_name} in repo {repo.name}")
-        entries = []
+        # Repositories seen in earlier runs continue from their watermark instead of the global period
+        watermark = self.repository_watermarks.get(repo.name)
+        start_date = self.start_date
+        if watermark:
+            logger.info(f"Using watermark {watermark['tag']} ({watermark['date']}) for {repo.name}")
+            start_date = watermark['date']
 
         # Use pre-fetched tags if available, otherwise fetch them
-        if hasattr(repo, '_tags') and repo._tags:
+        if isinstance(repo, RepoSnapshot) and repo.tags:
             logger.info(f"Using pre-fetched tags for {repo.name}")
-            all_tags = repo._tags
+            all_tags = repo.tags
             # Filter tags by date period
             tags = []
             for tag in all_tags:
-                if self.start_date <= tag['date'] <= self.end_date:
+                if start_date <= tag.date <= self.end_date:
                     tags.append(tag)
         else:
             logger.info(f"Fetching tags for {repo.name}")
             # Fetch tags here (in parallel) - this is the most time-consuming part
-            tags = get_tags_in_period(repo, self.start_date, self.end_date)
+            tags = get_tags_in_period(repo, start_date, self.end_date)
             # Get all tags for this repo (for finding previous tags)
             all_tags = get_repo_tags(repo)
 
+        # The watermark tag itself was processed in the previous run
+        if watermark:
+            tags = [tag for tag in tags if tag.date > watermark['date']]
+
+        tag_index = self.get_tag_index(repo, all_tags) if tags else None
+        releases = []
+        for tag in tags:
+            try:
+                releases.append((tag, self.find_previous_tag(repo, tag, tag_index, self.organization)))
+            except Exception as e:
+                logger.error(f"Error finding previous tag for {tag.name} of component {component_name}: {e}")
+
+        job['releases'] = releases
+        return releases
+
+    @metrics.timed("timeline.component_job")
+    def process_component_job(self, job: dict[str, Any]) -> list[ReleaseEntry]:
+        """
+        Process a single component job.
+        Uses the releases resolved by plan_component_job (planning the job first if needed)
+        and the commit ranges pre-fetched by generate_timeline.
+        Returns a list of entries (release notes) created for this component.
+        """
+        repo = job['repo']
+        component_name = job['component_name']
+        component_details = job['component_details']
+        component_stage = job['component_stage']
+
+        logger.info(f"Starting processing for component {component_name} in repo {repo.name}")
+        entries = []
+
+        releases = job['releases'] if 'releases' in job else self.plan_component_job(job)
+
         # Skip if no tags in period
-        if not tags:
+        if not releases:
             logger.info(f"No tags found for {repo.name} in the specified period, skipping component {component_name}")
             return entries
 
-        # Process each tag
+        # Fetch the changes of each tag and schedule its AI summary; summaries are generated
+        # in the AI worker pool while the changes of the next tags are being fetched
+        pending = []
         processed_tags_count = 0
-        for tag in tags:
+        for tag, previous_tag in releases:
             processed_tags_count += 1
 
             try:
-                # Find the previous tag
-                previous_tag = self.find_previous_tag(repo, tag, all_tags, self.organization)
+                # Get changes between tags, reusing the batched comparison when available
+                comparison = self._comparisons.get((repo.name, previous_tag.commit, tag.commit))
+                change_data = get_changes_between_tags(repo, previous_tag, tag, comparison=comparison,
+                                                       cache=self.compare_cache)
+                logger.info(f"Got {len(change_data.get('changes', []))} changes between {previous_tag.name} and {tag.name} for {repo.name}")
+
+                ai_future = None
+                if self.ai_summarizer and change_data['changes']:
+                    ai_changes = self.change_compactor.compact(change_data['changes'])
+                    if ai_changes:
+                        ai_future = self.ai_summarizer.submit(repo.name, previous_tag.name, tag.name, ai_changes)
+                    else:
+                        logger.info(f"Only ignored changes between {previous_tag.name} and {tag.name} for {repo.name}, "
+                                    f"skipping AI summary")
+                pending.append((tag, previous_tag, change_data['changes'], ai_future))
 
-                # Get changes between tags
-                change_data = get_changes_between_tags(repo, previous_tag, tag)
-                logger.info(f"Got {len(change_data.get('changes', []))} changes between {previous_tag['name']} and {tag['name']} for {repo.name}")
+            except Exception as e:
+                logger.error(f"Critical error processing tag {tag.name} for component {component_name}: {e}")
+                self._mark_repo_failed(repo.name)
+                # Continue with next tag instead of stopping the entire process
+                continue
 
-                # Generate AI description if enabled
-                ai_description = None
-                if self.google_ai_model and change_data['changes']:
-                    try:
-                        ai_description = generate_ai_description(
-                            self.google_ai_model,
-                            repo.name,
-                            previous_tag['name'],
-                            tag['name'],
-                            change_data['changes']
-                        )
-                        # If ai_description failed and returned None, disable the model for future tags
-                        if ai_description is None and self.google_ai_model is not None:
-                            logger.info("AI description generation failed - disabling for subsequent tags")
-                            self.google_ai_model = None
-                    except Exception as ai_error:
-                        logger.warning(f"AI description generation failed for {component_name} {tag['name']}: {ai_error}")
-                        # Don't disable the model, just continue without AI description
-                        ai_description = None
-
-                # Add the AI description to the change data
-                change_data['ai_description'] = ai_description
+        for tag, previous_tag, changes, ai_future in pending:
+            try:
+                # The summarizer resolves failed summaries to None
+                ai_description = ai_future.result() if ai_future else None
 
                 # Create entry for this release
-                entry = {
-                    'date': tag['date'],
-                    'type': 'release',
-                    'repo_name': repo.name,
-                    'github_organization': self.organization,
-                    'component_name': component_name,
-                    'component_details': component_details,
-                    'tag_name': tag['name'],
-                    'changes': change_data['changes'],
-                    'tag_url': f"https://github.com/{self.organization}/{repo.name}/releases/tag/{tag['name']}",
-                    'ai_description': change_data['ai_description'],
-                    'previous_tag': previous_tag['name'],
-                    'component_stage': component_stage
-                }
+                entry = ReleaseEntry(
+                    date=tag.date,
+                    repo_name=repo.name,
+                    github_organization=self.organization,
+                    component_name=component_name,
+                    component_details=component_details,
+                    component_stage=component_stage,
+                    tag_name=tag.name,
+                    previous_tag=previous_tag.name,
+                    tag_url=f"https://github.com/{self.organization}/{repo.name}/releases/tag/{tag.name}",
+                    changes=changes,
+                    ai_description=ai_description
+                )
 
                 # Save to table
-                logger.info(f"Attempting to save release for {component_name} {tag['name']} (component_id: {component_name})")
-                is_new = save_release_to_table(self.ci, entry, self.config.table_name)
+                logger.info(f"Attempting to save release for {component_name} {tag.name} (component_id: {component_name})")
+                is_new = self.table_writer.write(entry)
 
                 if is_new:
                     entries.append(entry)
-                    logger.info(f"Created release note for {component_name} {tag['name']}")
+                    logger.info(f"Created release note for {component_name} {tag.name}")
                 else:
-                    logger.info(f"Release note for {component_name} {tag['name']} already exists, skipping")
+                    logger.info(f"Release note for {component_name} {tag.name} already exists, skipping")
 
             except Exception as e:
-                logger.error(f"Critical error processing tag {tag['name']} for component {component_name}: {e}")
+                logger.error(f"Critical error processing tag {tag.name} for component {component_name}: {e}")
+                self._mark_repo_failed(repo.name)
                 # Continue with next tag instead of stopping the entire process
                 continue
 
@@ -279,43 +398,131 @@ class ReleaseNotesGenerator:
 
         return entries
 
-    def generate_timeline(self) -> List[dict[str, Any]]:
-        """Generate a timeline of all changes across repositories using parallel processing."""
-        logger.info("Generating timeline of changes with sequential processing for debugging")
+    def _mark_repo_failed(self, repo_name: str) -> None:
+        """Remember a repository whose tags were not all processed, so its watermark is not advanced."""
+        with self._failed_repos_lock:
+            self._failed_repos.add(repo_name)
+
+    def collect_repository_watermarks(self) -> dict[str, dict[str, Any]]:
+        """
+        Compute new watermarks (newest tag) for the repositories processed in this run.
+        Repositories with failed tags keep their previous watermark; if they had none,
+        they get one at the start of this run's period so those tags are retried next time.
+        Without a component catalog no job ran, so no watermark moves.
+        """
+        watermarks = {}
+        if self.component_catalog is None:
+            return watermarks
+
+        for repo in self.repositories:
+            if repo.name in self._failed_repos:
+                if repo.name not in self.repository_watermarks:
+                    watermarks[repo.name] = {'tag': None, 'commit': None, 'date': self.start_date}
+                continue
 
-        # Step 1: Collect all component jobs (without fetching tags)
-        component_jobs = self.collect_component_jobs()
+            tags = [tag for tag in getattr(repo, 'tags', []) if tag.date <= self.end_date]
+            if not tags:
+                continue
 
-        # Step 2: Process component jobs sequentially for debugging
-        logger.info(f"Processing {len(component_jobs)} component jobs sequentially")
-        
-        for i, job in enumerate(component_jobs):
-            try:
-                logger.info(f"Processing job {i+1}/{len(component_jobs)}: {job['component_name']}")
-                
-                # Get the entries from this job
-                job_entries = self.process_component_job(job)
+            newest_tag = max(tags, key=lambda t: t.date)
+            previous = self.repository_watermarks.get(repo.name)
+            if previous is None or newest_tag.date > previous['date']:
+                watermarks[repo.name] = {'tag': newest_tag.name, 'commit': newest_tag.commit, 'date': newest_tag.date}
 
-                # Add to new releases list
-                self.new_releases.extend(job_entries)
+        return watermarks
 
-                logger.info(f"Completed processing component {job['component_name']} - "
-                            f"generated {len(job_entries)} entries")
-                
-                # Force log flush
-                import sys
-                sys.stdout.flush()
+    def close(self) -> None:
+        """Stop the AI worker pool, close the caches and the pooled GitHub connections (logging their usage)."""
+        if self.ai_summarizer:
+            self.ai_summarizer.close()
+            logger.info(f"AI usage: {self.ai_summarizer.summary()}")
+            logger.info(f"AI change compaction: {self.change_compactor.summary()}")
 
-            except Exception as e:
-                logger.error(f"Error processing component {job['component_name']}: {e}")
-                # Force log flush
-                import sys
-                sys.stdout.flush()
+        for cache in (self.compare_cache, self.ai_summary_cache, self.blob_cache, self.component_names_cache):
+            if cache is not None:
+                cache.close()
 
-        # Update state file with latest processed date if we have new releases
-        if self.new_releases:
-            latest_date = max(release['date'] for release in self.new_releases)
-            update_state_file(self.ci, latest_date)
+        self.github.close()
+
+    def generate_timeline(self) -> List[ReleaseEntry]:
+        """Generate a timeline of all changes across repositories using parallel processing."""
+        max_workers = self.config.max_workers
+        logger.info(f"Generating timeline of changes with {max_workers} worker(s)")
+
+        try:
+            # Step 1: Collect all component jobs (without fetching tags)
+            with metrics.timer("timeline.collect_jobs"):
+                component_jobs = self.collect_component_jobs()
+
+            # Results are stored by job index so the final order does not depend on completion order
+            job_results = [[] for _ in component_jobs]
+
+            with ReleaseTableWriter(self.ci, self.config.table_name) as self.table_writer, \
+                    concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                          thread_name_prefix='component-job') as executor:
+                # Step 2: Resolve tags and previous tags of every job
+                with metrics.timer("timeline.plan_jobs"):
+                    list(executor.map(self.plan_component_job, component_jobs))
+
+                # Step 3: Fetch all commit ranges in a few batched GraphQL queries
+                ranges = [
+                    (job['repo'], previous_tag, tag)
+                    for job in component_jobs
+                    for tag, previous_tag in job['releases']
+                ]
+                try:
+                    self._comparisons = compare_many(self.github, ranges, cache=self.compare_cache)
+                except Exception as e:
+                    logger.error(f"Batched compare failed, falling back to per-tag compares: {e}")
+                    self._comparisons = {}
+
+                # Step 4: Process component jobs in a bounded worker pool
+                logger.info(f"Processing {len(component_jobs)} component jobs with {max_workers} worker(s)")
+                process_started = time.monotonic()
+                future_to_index = {
+                    executor.submit(self.process_component_job, job): i
+                    for i, job in enumerate(component_jobs)
+                }
+
+                completed = 0
+                for future in concurrent.futures.as_completed(future_to_index):
+                    i = future_to_index[future]
+                    job = component_jobs[i]
+                    completed += 1
+                    try:
+                        job_results[i] = future.result()
+                        logger.info(f"Completed job {completed}/{len(component_jobs)}: component {job['component_name']} - "
+                                    f"generated {len(job_results[i])} entries")
+                    except Exception as e:
+                        logger.error(f"Error processing component {job['component_name']}: {e}")
+                        self._mark_repo_failed(job['repo'].name)
+
+                    # Force log flush
+                    sys.stdout.flush()
+
+                metrics.record("timeline.process_jobs", time.monotonic() - process_started)
+        finally:
+            # Worker pools, caches and connections are released even when the run fails
+            self.close()
+
+        # Merge in job order - only the main thread touches self.new_releases
+        for job_entries in job_results:
+            self.new_releases.extend(job_entries)
+
+        # Per-repository watermarks track progress, so the global date only bounds repositories never seen before;
+        # it stays put when discovery or the catalog failed, so the repositories they missed are retried from the same date
+        period_complete = self.discovery_complete and self.component_catalog is not None
+        if not period_complete:
+            logger.warning("Repository discovery or the component catalog failed, "
+                           "keeping the last processed date from the previous run")
+        update_state_file(self.ci, self.end_date if period_complete else None,
+                          self.collect_repository_watermarks(), component_catalog=self.component_catalog,
+                          component_names=self.component_names_cache.entries)
 
         logger.info(f"Generated {len(self.new_releases)} new release notes")
+
+        # Per-stage timings, bytes and GraphQL points of this run
+        metrics_rows = metrics.log_summary()
+        if self.config.metrics_table_name:
+            save_run_metrics_to_table(self.ci, metrics_rows, metrics.started_at, self.config.metrics_table_name)
         return self.new_releases
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Pooled GitHub GraphQL client.
+Keeps keep-alive HTTP/2 connections open for the whole run and supports both
+blocking calls (used from worker threads) and asyncio calls with a bounded
+number of in-flight queries. Every request goes through one scheduler that
+applies timeouts, retries transient failures with jittered exponential backoff
+and pauses before the rate limit budget runs out. Large responses can be parsed
+incrementally while they are downloaded (see DataStreamParser).
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import httpx
+import ijson
+from src.config import logger
+from src.metrics_utils import metrics
+
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_BACKOFF_SECONDS = 60.0
+
+
+class RetryableError(Exception):
+    """A request failed in a way that is worth retrying after `delay` seconds (None = backoff)."""
+
+    def __init__(self, message: str, delay: Optional[float] = None):
+        super().__init__(message)
+        self.delay = delay
+
+
+class DataStreamParser:
+    """
+    Incremental parser of a GraphQL response body.
+    Every top-level field of `data` is passed to handle_field(name, value) as soon as it is
+    complete and only the handler result is kept, so at most one field subtree is held in
+    memory while the rest of the response is still downloading.
+    """
+
+    def __init__(self, handle_field: Callable[[str, Any], Any]):
+        self.handle_field = handle_field
+        self.results = {}
+        self.data_is_null = False
+        self._events = ijson.sendable_list()
+        self._parser = ijson.parse_coro(self._events, use_float=True)
+        self._field = None
+        self._builder = None
+        self._errors_builder = None
+
+    @property
+    def errors(self) -> Optional[list]:
+        return self._errors_builder.value if self._errors_builder else None
+
+    def feed(self, chunk: bytes) -> None:
+        self._parser.send(chunk)
+        self._process_events()
+
+    def close(self) -> None:
+        """Finish parsing; raises ijson.JSONError if the body was incomplete."""
+        self._parser.close()
+        self._process_events()
+
+    def _finish_field(self) -> None:
+        if self._builder is not None:
+            self.results[self._field] = self.handle_field(self._field, self._builder.value)
+            self._builder = None
+
+    def _process_events(self) -> None:
+        for prefix, event, value in self._events:
+            if prefix == 'data' and event in ('map_key', 'end_map'):
+                self._finish_field()
+                if event == 'map_key':
+                    self._field = value
+                    self._builder = ijson.ObjectBuilder()
+            elif self._builder is not None:
+                self._builder.event(event, value)
+            elif prefix == 'data' and event == 'null':
+                self.data_is_null = True
+            elif prefix == 'errors' or prefix.startswith('errors.'):
+                if self._errors_builder is None:
+                    self._errors_builder = ijson.ObjectBuilder()
+                self._errors_builder.event(event, value)
+        del self._events[:]
+
+
+class GitHubGraphQLClient:
+    """GitHub GraphQL client with connection reuse, retries and rate limit tracking for sync and async callers."""
+
+    def __init__(self, token: str, url: str = GITHUB_GRAPHQL_URL, max_concurrency: int = 8, timeout: float = 60.0,
+                 max_retries: int = 5, backoff_seconds: float = 1.0, min_remaining_points: int = 100):
+        self.url = url
+        self.token = token
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.min_remaining_points = min_remaining_points
+
+        # Rate limit budget as reported by the X-RateLimit-* headers
+        self._lock = threading.Lock()
+        self.remaining = None
+        self.reset_at = None
+        self.requests = 0
+        self.retries = 0
+        self._used_by_window = {}
+
+        # Blocking pool, shared by all threads (httpx.Client is thread-safe)
+        self._client = httpx.Client(
+            http2=True,
+            headers=self.headers,
+            timeout=self._timeout(),
+            limits=self._limits()
+        )
+
+        # Async pool, kept open for the whole run on the event loop thread started by the first run()
+        self._async_client = httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            timeout=self._timeout(),
+            limits=self._limits()
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.max_concurrency,
+                            max_keepalive_connections=self.max_concurrency)
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout, connect=min(self.timeout, 10.0))
+
+    def _record_rate_limit(self, response: httpx.Response) -> None:
+        """Track the remaining budget and the points used in every rate limit window."""
+        headers = response.headers
+        if "x-ratelimit-remaining" not in headers:
+            return
+
+        with self._lock:
+            self.remaining = int(headers["x-ratelimit-remaining"])
+            self.reset_at = float(headers.get("x-ratelimit-reset", 0)) or None
+            if "x-ratelimit-used" in headers:
+                used = int(headers["x-ratelimit-used"])
+                low, high = self._used_by_window.get(self.reset_at, (used, used))
+                self._used_by_window[self.reset_at] = (min(low, used), max(high, used))
+
+    def _throttle_delay(self) -> float:
+        """Seconds to wait before sending, so the budget is not exhausted mid-run."""
+        with self._lock:
+            if self.remaining is None or self.remaining > self.min_remaining_points or not self.reset_at:
+                return 0.0
+            return max(0.0, self.reset_at - time.time() + 1)
+
+    def _backoff(self, attempt: int, delay: Optional[float]) -> float:
+        """Server-provided delay if any, otherwise full-jitter exponential backoff."""
+        if delay is not None:
+            return delay
+        return random.uniform(0, min(MAX_BACKOFF_SECONDS, self.backoff_seconds * 2 ** attempt))
+
+    def _check_response(self, response: httpx.Response) -> Optional[Dict[str, Any]]:
+        """
+        Raise RetryableError for responses that should be retried.
+        Returns the parsed JSON body of a 200 response (None for other statuses), so it is parsed only once.
+        """
+        self._record_rate_limit(response)
+        retry_after = response.headers.get("retry-after")
+        delay = float(retry_after) if retry_after and retry_after.isdigit() else None
+
+        if response.status_code in RETRY_STATUS_CODES:
+            raise RetryableError(f"HTTP {response.status_code}", delay)
+
+        if response.status_code == 403:
+            # Primary limit exhausted or secondary (abuse) rate limit
+            if response.headers.get("x-ratelimit-remaining") == "0":
+                reset = float(response.headers.get("x-ratelimit-reset", 0))
+                raise RetryableError("rate limit exhausted", max(0.0, reset - time.time() + 1))
+            if retry_after or "secondary rate limit" in response.text.lower():
+                raise RetryableError("secondary rate limit", 60.0 if delay is None else delay)
+
+        if response.status_code != 200:
+            return None
+
+        # A 200 with a body that is not a GraphQL JSON object (e.g. an HTML page from a proxy) is transient
+        try:
+            body = response.json()
+        except ValueError as e:
+            raise RetryableError(f"invalid JSON response ({e})", delay)
+        if not isinstance(body, dict):
+            raise RetryableError(f"unexpected JSON response of type {type(body).__name__}", delay)
+
+        self._check_errors(body.get("errors"), delay)
+        return body
+
+    def _check_errors(self, errors: Optional[list], delay: Optional[float] = None) -> None:
+        """Raise RetryableError if GraphQL reports that the query was rate limited."""
+        if any(isinstance(error, dict) and error.get("type") == "RATE_LIMITED" for error in errors or []):
+            raise RetryableError("GraphQL RATE_LIMITED", self._throttle_delay() or delay)
+
+    @staticmethod
+    def _parse_response(response: httpx.Response, body: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Return the `data` part of a GraphQL response body checked by _check_response(), or None on HTTP/GraphQL errors."""
+        if response.status_code != 200:
+            logger.error(f"GraphQL API error: {response.status_code} - {response.text}")
+            return None
+
+        if "errors" in body:
+            logger.error(f"GraphQL errors: {body['errors']}")
+            return None
+
+        return body.get("data")
+
+    def _stream_result(self, parser: DataStreamParser) -> Optional[Dict[str, Any]]:
+        """Return the handled `data` fields of a streamed response, or None on GraphQL errors."""
+        if parser.errors:
+            self._check_errors(parser.errors)
+            logger.error(f"GraphQL errors: {parser.errors}")
+            return None
+        return None if parser.data_is_null else parser.results
+
+    @staticmethod
+    def _record_request(started: float, response: Optional[httpx.Response], data: Optional[Dict[str, Any]]) -> None:
+        """Record one attempt in the run metrics with its downloaded bytes and query cost."""
+        cost = ((data.get("rateLimit") or {}).get("cost") if isinstance(data, dict) else None)
+        if cost is None:
+            # Every answered query costs at least one point
+            cost = 1 if response is not None and response.status_code == 200 else 0
+        received = 0
+        if response is not None:
+            received = response.num_bytes_downloaded
+            if not received:
+                # Bodies that did not pass through the network reader (e.g. built in memory)
+                try:
+                    received = len(response.content)
+                except httpx.ResponseNotRead:
+                    received = 0
+        metrics.record("github.request", time.monotonic() - started, bytes=received, points=cost, error=data is None)
+
+    def _send(self, payload: dict, handle_field: Optional[Callable[[str, Any], Any]]) -> Optional[Dict[str, Any]]:
+        """One blocking attempt; streams and parses the body incrementally when handle_field is given."""
+        started = time.monotonic()
+        response = data = None
+        try:
+            if handle_field is None:
+                response = self._client.post(self.url, json=payload)
+                data = self._parse_response(response, self._check_response(response))
+                return data
+
+            with self._client.stream("POST", self.url, json=payload) as response:
+                if response.status_code != 200:
+                    response.read()
+                    data = self._parse_response(response, self._check_response(response))
+                    return data
+                self._record_rate_limit(response)
+                parser = DataStreamParser(handle_field)
+                try:
+                    for chunk in response.iter_bytes():
+                        parser.feed(chunk)
+                    parser.close()
+                except ijson.JSONError as e:
+                    # Same as the non-stream path: a 200 with a body that is not valid JSON is transient
+                    raise RetryableError(f"invalid JSON response ({e})")
+            data = self._stream_result(parser)
+            return data
+        finally:
+            self._record_request(started, response, data)
+
+    async def _send_async(self, async_client: httpx.AsyncClient, payload: dict,
+                          handle_field: Optional[Callable[[str, Any], Any]]) -> Optional[Dict[str, Any]]:
+        """Async version of _send()."""
+        started = time.monotonic()
+        response = data = None
+        try:
+            if handle_field is None:
+                response = await async_client.post(self.url, json=payload)
+                data = self._parse_response(response, self._check_response(response))
+                return data
+
+            async with async_client.stream("POST", self.url, json=payload) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    data = self._parse_response(response, self._check_response(response))
+                    return data
+                self._record_rate_limit(response)
+                parser = DataStreamParser(handle_field)
+                try:
+                    async for chunk in response.aiter_bytes():
+                        parser.feed(chunk)
+                    parser.close()
+                except ijson.JSONError as e:
+                    # Same as the non-stream path: a 200 with a body that is not valid JSON is transient
+                    raise RetryableError(f"invalid JSON response ({e})")
+            data = self._stream_result(parser)
+            return data
+        finally:
+            self._record_request(started, response, data)
+
+    def _should_retry(self, attempt: int, error: Exception) -> Optional[float]:
+        """Return the delay before the next attempt, or None when the error is final."""
+        if attempt >= self.max_retries:
+            logger.error(f"GraphQL request failed after {attempt + 1} attempts: {error}")
+            return None
+        delay = self._backoff(attempt, getattr(error, "delay", None))
+        with self._lock:
+            self.retries += 1
+        logger.warning(f"GraphQL request failed ({error}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        return delay
+
+    def execute(self, query: str, variables: Optional[dict] = None,
+                handle_field: Optional[Callable[[str, Any], Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Execute a GraphQL query over the pooled blocking connection.
+        With handle_field, the response is parsed while it downloads and every top-level
+        `data` field is replaced by handle_field(name, value) (see DataStreamParser).
+        """
+        payload = {"query": query, "variables": variables or {}}
+        for attempt in range(self.max_retries + 1):
+            throttle = self._throttle_delay()
+            if throttle:
+                logger.warning(f"GitHub rate limit budget low ({self.remaining} points), waiting {throttle:.0f}s")
+                time.sleep(throttle)
+
+            with self._lock:
+                self.requests += 1
+            try:
+                return self._send(payload, handle_field)
+            except (RetryableError, httpx.TimeoutException, httpx.TransportError) as e:
+                delay = self._should_retry(attempt, e)
+                if delay is None:
+                    return None
+                time.sleep(delay)
+        return None
+
+    async def execute_async(self, query: str, variables: Optional[dict] = None,
+                            handle_field: Optional[Callable[[str, Any], Any]] = None) -> Optional[Dict[str, Any]]:
+        """Execute a GraphQL query from inside run(), bounded by max_concurrency."""
+        if self._loop is None or asyncio.get_running_loop() is not self._loop:
+            raise RuntimeError("execute_async() must be called from a coroutine started with GitHubGraphQLClient.run()")
+
+        payload = {"query": query, "variables": variables or {}}
+        for attempt in range(self.max_retries + 1):
+            throttle = self._throttle_delay()
+            if throttle:
+                logger.warning(f"GitHub rate limit budget low ({self.remaining} points), waiting {throttle:.0f}s")
+                await asyncio.sleep(throttle)
+
+            with self._lock:
+                self.requests += 1
+            try:
+                async with self._semaphore:
+                    return await self._send_async(self._async_client, payload, handle_field)
+            except (RetryableError, httpx.TimeoutException, httpx.TransportError) as e:
+                delay = self._should_retry(attempt, e)
+                if delay is None:
+                    return None
+                await asyncio.sleep(delay)
+        return None
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        """Return the event loop of the async pool, starting its thread on first use."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name="github-async", daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    def run(self, coroutine):
+        """
+        Run a coroutine on the client's event loop and wait for its result.
+        All run() calls share one loop, one pooled HTTP/2 async connection and one
+        max_concurrency limit, so discovery, compare and blob fetches reuse the same
+        connections; they are closed by close().
+        """
+        loop = self._event_loop()
+        if threading.current_thread() is self._loop_thread:
+            raise RuntimeError("run() cannot be called from a coroutine already running on the client's event loop")
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def points_spent(self) -> int:
+        """Approximate rate limit points used by this client (each query costs at least one point)."""
+        with self._lock:
+            return sum(high - low + 1 for low, high in self._used_by_window.values())
+
+    def summary(self) -> str:
+        return (f"{self.requests} GraphQL requests, {self.retries} retries, "
+                f"~{self.points_spent()} rate limit points spent, {self.remaining} remaining")
+
+    def close(self) -> None:
+        """Log the request summary, close both connection pools and stop the event loop thread."""
+        logger.info(f"GitHub API usage: {self.summary()}")
+        self._client.close()
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._async_client.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._loop_thread.join()
+        loop.close()
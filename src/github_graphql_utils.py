@@ -7,173 +7,289 @@ import datetime
 import re
 import traceback
 import json
-from typing import List, Dict, Any, Optional
-import requests
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import List, Dict, Optional
 from src.config import GITHUB_ORGANIZATION, REPO_PATTERNS, logger
+from src.github_client import GitHubGraphQLClient
+from src.cache_utils import SQLiteCache
+from src.models import Change, RepoSnapshot, Tag, parse_github_datetime
+from src.metrics_utils import metrics
+from src.component_utils import scan_component_identifiers
 
 
-class GraphQLRepoWrapper:
-    """Wrapper class to make GraphQL repo data compatible with PyGithub repo objects."""
-    
-    def __init__(self, repo_data: dict, github_client: dict):
-        self._data = repo_data
-        self._github_client_data = github_client
-        
-        # Pre-fetched data
-        self._tags = repo_data.get('_tags', [])
-        self._workflow_files = repo_data.get('_workflow_files', [])
-        self._package_json = repo_data.get('_package_json')
-    
-    @property
-    def name(self):
-        return self._data['name']
-    
-    @property
-    def full_name(self):
-        return self._data['full_name']
-    
-    @property
-    def url(self):
-        return self._data['url']
-    
-    @property
-    def default_branch(self):
-        return self._data['default_branch']
-    
+def tag_ref(tag_name: str) -> str:
+    """Qualified ref name of a tag."""
+    return f"refs/tags/{tag_name}"
+
+
+class CommitRangeWalker:
+    """
+    Collects the commits of base..head page by page.
+    With the ref names of base and head the exact range is walked with Ref.compare: every commit
+    reachable from head but not from base, including commits of merged branches whose dates are
+    older than the base commit. When the refs cannot be compared, the comparison is DIVERGED
+    (base is not an ancestor of head, e.g. the previous tag is on another branch) or the range is
+    longer than MAX_COMMITS, the walker falls back to the history of head, which comes newest first
+    and stops at the base commit or the first commit that is not newer than it.
+    Pages start small and double in size, so the transferred payload follows the real
+    size of the range instead of always fetching a full page of history.
+    """
+
+    INITIAL_PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+    MAX_COMMITS = 1000
+
+    def __init__(self, repo, base, head, base_ref: Optional[str] = None, head_ref: Optional[str] = None):
+        self.repo = repo
+        self.base = base
+        self.head = head
+        self.base_ref = base_ref
+        self.head_ref = head_ref
+        self.use_compare = bool(base_ref and head_ref)
+        self.commits = []
+        self.cursor = None
+        self.page_size = self.INITIAL_PAGE_SIZE
+        self.done = False
+        self.failed = False
+
     @property
-    def _github_client(self):
-        return self._github_client_data
-    
+    def key(self):
+        return self.repo.name, self.base, self.head
+
+    def query_part(self, index: int) -> tuple[str, list, dict]:
+        """Return the aliased query fragment, variable definitions and variables for the next page."""
+        if self.use_compare:
+            return self._compare_query_part(index)
+        return self._history_query_part(index)
+
+    def _compare_query_part(self, index: int) -> tuple[str, list, dict]:
+        query_part = f"""
+        range{index}: repository(owner: "{GITHUB_ORGANIZATION}", name: "{self.repo.name}") {{
+            baseRef: ref(qualifiedName: $baseRef{index}) {{
+                compare(headRef: $headRef{index}) {{
+                    status
+                    aheadBy
+                    commits(first: {self.page_size}, after: $after{index}) {{
+                        pageInfo {{
+                            hasNextPage
+                            endCursor
+                        }}
+                        nodes {{
+                            oid
+                            message
+                            author {{
+                                name
+                                date
+                            }}
+                        }}
+                    }}
+                }}
+            }}
+        }}
+        """
+        variable_definitions = [f"$baseRef{index}: String!", f"$headRef{index}: String!", f"$after{index}: String"]
+        variables = {f"baseRef{index}": self.base_ref, f"headRef{index}": self.head_ref, f"after{index}": self.cursor}
+        return query_part, variable_definitions, variables
+
+    def _history_query_part(self, index: int) -> tuple[str, list, dict]:
+        query_part = f"""
+        range{index}: repository(owner: "{GITHUB_ORGANIZATION}", name: "{self.repo.name}") {{
+            baseCommit: object(expression: $base{index}) {{
+                ... on Commit {{
+                    oid
+                    committedDate
+                }}
+            }}
+            headCommit: object(expression: $head{index}) {{
+                ... on Commit {{
+                    history(first: {self.page_size}, after: $after{index}) {{
+                        pageInfo {{
+                            hasNextPage
+                            endCursor
+                        }}
+                        nodes {{
+                            oid
+                            message
+                            committedDate
+                            author {{
+                                name
+                                date
+                            }}
+                        }}
+                    }}
+                }}
+            }}
+        }}
+        """
+        variable_definitions = [f"$base{index}: String!", f"$head{index}: String!", f"$after{index}: String"]
+        variables = {f"base{index}": self.base, f"head{index}": self.head, f"after{index}": self.cursor}
+        return query_part, variable_definitions, variables
+
+    def apply_page(self, repo_data: Optional[dict]) -> None:
+        """Consume one page of the range returned for this walker."""
+        if self.use_compare:
+            self._apply_compare_page(repo_data)
+        else:
+            self._apply_history_page(repo_data)
+
+    def _fall_back_to_history(self, reason: str) -> None:
+        """Restart the walk on the history of head, bounded by the base commit date."""
+        logger.warning(f"{reason} for {self.base_ref}...{self.head_ref} in {self.repo.name}, "
+                       f"falling back to the history of {self.head} down to the base commit date")
+        self.use_compare = False
+        self.commits = []
+        self.cursor = None
+        self.page_size = self.INITIAL_PAGE_SIZE
+
+    def _next_page(self, page_info: dict) -> bool:
+        """Advance the cursor and grow the page size; returns False on the last page."""
+        if not page_info["hasNextPage"]:
+            return False
+        self.cursor = page_info["endCursor"]
+        self.page_size = min(self.page_size * 2, self.MAX_PAGE_SIZE)
+        return True
+
+    @staticmethod
+    def _commit(commit_data: dict) -> dict:
+        return {
+            'sha': commit_data["oid"],
+            'message': commit_data["message"],
+            'author': {
+                'name': commit_data["author"]["name"] if commit_data["author"] else "Unknown",
+                'date': commit_data["author"]["date"] if commit_data["author"] else None
+            }
+        }
+
+    def _apply_compare_page(self, repo_data: Optional[dict]) -> None:
+        comparison = ((repo_data or {}).get("baseRef") or {}).get("compare")
+        if not comparison:
+            self._fall_back_to_history("Refs could not be compared")
+            return
+        if comparison["status"] == "DIVERGED":
+            self._fall_back_to_history("Base is not an ancestor of head")
+            return
+        if comparison["aheadBy"] > self.MAX_COMMITS:
+            # The history walk keeps the newest commits when it truncates
+            self._fall_back_to_history(f"Range has {comparison['aheadBy']} commits, more than {self.MAX_COMMITS}")
+            return
+
+        self.commits.extend(self._commit(commit_data) for commit_data in comparison["commits"]["nodes"])
+        if not self._next_page(comparison["commits"]["pageInfo"]):
+            # Comparison commits come oldest first, the history walk (and the release notes) newest first
+            self.commits.reverse()
+            self.done = True
+
+    def _apply_history_page(self, repo_data: Optional[dict]) -> None:
+        if not repo_data or not repo_data.get("baseCommit") or not repo_data.get("headCommit"):
+            logger.error(f"Repository or commit not found for {self.base}...{self.head} in {self.repo.name}")
+            self.failed = True
+            self.done = True
+            return
+
+        base_oid = repo_data["baseCommit"]["oid"]
+        base_date = parse_github_datetime(repo_data["baseCommit"]["committedDate"])
+        history = repo_data["headCommit"]["history"]
+
+        for commit_data in history["nodes"]:
+            # Everything from the base commit onwards is already part of the previous release
+            if commit_data["oid"] == base_oid:
+                self.done = True
+                return
+
+            # Commits not newer than the base are older than the previous release
+            if parse_github_datetime(commit_data["committedDate"]) <= base_date:
+                logger.info(f"Reached commits older than base {self.base} in {self.repo.name}, stopping at its commit date")
+                self.done = True
+                return
+
+            self.commits.append(self._commit(commit_data))
+
+            if len(self.commits) >= self.MAX_COMMITS:
+                logger.warning(f"Range {self.base}...{self.head} in {self.repo.name} exceeds {self.MAX_COMMITS} commits, truncating")
+                self.done = True
+                return
+
+        if not self._next_page(history["pageInfo"]):
+            logger.warning(f"Base commit {self.base} not found in the history of {self.head} in {self.repo.name}, "
+                           f"using all commits newer than it")
+            self.done = True
+
+    def comparison(self):
+        """Return the walked range as a GraphQLComparison, or None if it could not be resolved."""
+        if self.failed:
+            return None
+        logger.info(f"Found {len(self.commits)} commits between {self.base} and {self.head} for {self.repo.name}")
+        return GraphQLComparison(self.commits)
+
+
+def _build_range_walk_query(walkers: List[CommitRangeWalker]) -> tuple[str, dict]:
+    """Build one aliased query fetching the next history page of every walker."""
+    query_parts = []
+    variable_definitions = []
+    variables = {}
+
+    for i, walker in enumerate(walkers):
+        query_part, walker_definitions, walker_variables = walker.query_part(i)
+        query_parts.append(query_part)
+        variable_definitions.extend(walker_definitions)
+        variables.update(walker_variables)
+
+    query = f"""
+    query({", ".join(variable_definitions)}) {{
+        {" ".join(query_parts)}
+    }}
+    """
+    return query, variables
+
+
+class GraphQLComparison:
+    """Comparison result compatible with PyGithub comparison objects."""
+
+    def __init__(self, commits):
+        self.commits = commits
+
+    def __iter__(self):
+        return iter(self.commits)
+
+    def __len__(self):
+        return len(self.commits)
+
+
+@dataclass(slots=True, eq=False)
+class GraphQLRepoWrapper(RepoSnapshot):
+    """RepoSnapshot bound to the GraphQL client, compatible with the PyGithub repo methods used here."""
+    github_client: Optional[GitHubGraphQLClient] = None
+    # Set when the component names are known without parsing (see component_names_cache_key)
+    component_names: Optional[List[str]] = None
+    blob_texts_complete: bool = True
+
     def get_tags(self):
-        """Return tags in PyGithub format."""
-        return self._tags
-    
+        """Return the pre-fetched tags."""
+        return self.tags
 
-    
-    def compare(self, base, head):
-        """Compare two commits using GraphQL."""
+    @metrics.timed("github.compare")
+    def compare(self, base, head, base_ref=None, head_ref=None):
+        """Compare two commits using GraphQL; with their ref names the exact range is walked (see CommitRangeWalker)."""
         logger.info(f"Comparing commits {base} and {head} for {self.name}")
         try:
-            # GraphQL query to get commits between two SHAs
-            # We need to get the commit dates first, then use history with timestamps
-            query = """
-            query($owner: String!, $name: String!, $base: String!, $head: String!) {
-                repository(owner: $owner, name: $name) {
-                    baseCommit: object(expression: $base) {
-                        ... on Commit {
-                            committedDate
-                        }
-                    }
-                    headCommit: object(expression: $head) {
-                        ... on Commit {
-                            committedDate
-                            history(first: 100) {
-                                nodes {
-                                    oid
-                                    message
-                                    url
-                                    author {
-                                        name
-                                        date
-                                    }
-                                    committedDate
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-            """
-            
-            variables = {
-                "owner": GITHUB_ORGANIZATION,
-                "name": self.name,
-                "base": base,
-                "head": head
-            }
-            
-            response = requests.post(
-                self._github_client_data["url"], 
-                json={"query": query, "variables": variables}, 
-                headers=self._github_client_data["headers"]
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"GraphQL API error: {response.status_code} - {response.text}")
-                return None
-                
-            data = response.json()
-            if "errors" in data:
-                logger.error(f"GraphQL errors: {data['errors']}")
-                return None
-            
-            repo_data = data["data"]["repository"]
-            if not repo_data or not repo_data["baseCommit"] or not repo_data["headCommit"]:
-                logger.error(f"Repository or commit not found")
-                return None
-            
-            # Get base commit date
-            base_commit = repo_data["baseCommit"]
-            if not base_commit:
-                logger.error(f"Base commit not found")
-                return None
-            
-            # Get head commit and its history
-            head_commit = repo_data["headCommit"]
-            if not head_commit or not head_commit["history"]:
-                logger.error(f"Head commit or history not found")
-                return None
-            
-            # Extract commits from history and filter by date
-            commits_data = head_commit["history"]["nodes"]
-            commits = []
-            
-            base_date = datetime.datetime.fromisoformat(base_commit["committedDate"].replace('Z', '+00:00'))
-            
-            for commit_data in commits_data:
-                commit_date = datetime.datetime.fromisoformat(commit_data["committedDate"].replace('Z', '+00:00'))
-                
-                # Only include commits that are newer than the base commit
-                if commit_date > base_date:
-                    commit = {
-                        'sha': commit_data["oid"],
-                        'message': commit_data["message"],
-                        'url': commit_data["url"],
-                        'author': {
-                            'name': commit_data["author"]["name"] if commit_data["author"] else "Unknown",
-                            'date': commit_data["author"]["date"] if commit_data["author"] else None
-                        }
-                    }
-                    commits.append(commit)
-            
-            # Create a mock comparison object similar to PyGithub
-            class MockComparison:
-                def __init__(self, commits):
-                    self.commits = commits
-                
-                def __iter__(self):
-                    return iter(self.commits)
-                
-                def __len__(self):
-                    return len(self.commits)
-            
-            logger.info(f"Found {len(commits)} commits between {base} and {head} for {self.name}")
-            return MockComparison(commits)
-            
+            walker = CommitRangeWalker(self, base, head, base_ref, head_ref)
+            while not walker.done:
+                data = self.github_client.execute(*_build_range_walk_query([walker]))
+                walker.apply_page(data.get("range0") if data else None)
+            return walker.comparison()
         except Exception as e:
             logger.error(f"Error in GraphQL compare: {e}")
             return None
 
 
-def initialize_github_client(token):
+@metrics.timed("github.initialize_client")
+def initialize_github_client(token, max_concurrency=8, timeout=60, max_retries=5):
     """Initialize GitHub GraphQL client with the provided token."""
     try:
-        # GraphQL endpoint
-        url = "https://api.github.com/graphql"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        }
+        github_client = GitHubGraphQLClient(token, max_concurrency=max_concurrency, timeout=timeout,
+                                            max_retries=max_retries)
         
         # Test the connection
         test_query = """
@@ -184,12 +300,11 @@ def initialize_github_client(token):
         }
         """
         
-        response = requests.post(url, json={"query": test_query}, headers=headers)
-        if response.status_code != 200:
-            raise Exception(f"GraphQL API error: {response.status_code} - {response.text}")
+        if github_client.execute(test_query) is None:
+            raise Exception("GraphQL API test query failed")
         
         logger.info("GitHub GraphQL client initialized successfully")
-        return {"url": url, "headers": headers, "token": token}
+        return github_client
         
     except Exception as e:
         logger.error(f"Error initializing GitHub GraphQL client: {e}")
@@ -198,249 +313,636 @@ def initialize_github_client(token):
         raise
 
 
+class RepositoryDiscoveryError(Exception):
+    """Repository discovery did not finish; `repositories` holds the repositories fetched before the failure."""
 
+    def __init__(self, message: str, repositories: Optional[List[GraphQLRepoWrapper]] = None):
+        super().__init__(message)
+        self.repositories = repositories or []
 
 
-def get_all_repositories_data_in_single_request(github_client: dict, organization: str) -> List[GraphQLRepoWrapper]:
+def _merge_discovery_results(results: list) -> List[GraphQLRepoWrapper]:
     """
-    Get all repositories data using ultra-optimized single GraphQL request.
-    Processes repositories in batches of 50 to handle all repositories.
+    Flatten repository lists gathered with return_exceptions=True.
+    If any of them failed, raise RepositoryDiscoveryError carrying every repository that was fetched.
     """
-    logger.info("Finding repositories with ultra-optimized single GraphQL request...")
-    
-    # First, get all repository names as dictionaries
-    all_repos_raw = get_repositories(github_client, organization)
-    logger.info(f"Found {len(all_repos_raw)} repositories matching pattern 'component'")
-    
-    # Convert to list of dictionaries for processing
-    all_repos = []
-    for repo in all_repos_raw:
-        if hasattr(repo, 'name'):
-            all_repos.append({
-                'name': repo.name,
-                'full_name': getattr(repo, 'full_name', repo.name),
-                'url': getattr(repo, 'url', ''),
-                'default_branch': getattr(repo, 'default_branch', 'main')
-            })
+    repos = []
+    errors = []
+    for result in results:
+        if isinstance(result, BaseException):
+            errors.append(result)
+            repos.extend(getattr(result, "repositories", []))
         else:
-            # If it's already a dict
-            all_repos.append(repo)
-    
-    all_processed_repos = []
+            repos.extend(result)
+    if errors:
+        raise RepositoryDiscoveryError(f"{len(errors)} discovery task(s) failed, first error: {errors[0]}", repos)
+    return repos
+
+
+class AdaptiveBatchSizer:
+    """
+    Chooses how many repositories go into one aliased enrichment query.
+    Failed batches halve the size, slow batches shrink it towards target_latency and
+    fast batches grow it again. Latency and GraphQL cost of every batch are recorded.
+    """
+
+    def __init__(self, initial_size: int = 50, min_size: int = 1, max_size: int = 100, target_latency: float = 10.0):
+        self.size = initial_size
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_latency = target_latency
+        self.history = []
+
+    def record(self, batch_size: int, latency: float, rate_limit: Optional[dict] = None) -> None:
+        """Record a successful batch and adapt the size to its latency."""
+        cost = (rate_limit or {}).get("cost")
+        self.history.append({"size": batch_size, "latency": latency, "cost": cost,
+                             "remaining": (rate_limit or {}).get("remaining"), "ok": True})
+        logger.info(f"Batch of {batch_size} repositories took {latency:.2f}s (cost {cost})")
+
+        if latency > self.target_latency:
+            self.size = max(self.min_size, min(self.size, int(batch_size * self.target_latency / latency)))
+        elif latency < self.target_latency / 2 and batch_size >= self.size:
+            self.size = min(self.max_size, self.size + max(1, self.size // 4))
+
+    def record_failure(self, batch_size: int, latency: float) -> None:
+        """Record a failed batch and halve the size."""
+        self.history.append({"size": batch_size, "latency": latency, "cost": None, "remaining": None, "ok": False})
+        self.size = max(self.min_size, min(self.size, batch_size // 2))
+        logger.warning(f"Batch of {batch_size} repositories failed after {latency:.2f}s, batch size is now {self.size}")
+
+    def summary(self) -> str:
+        succeeded = [batch for batch in self.history if batch["ok"]]
+        total_cost = sum(batch["cost"] or 0 for batch in succeeded)
+        total_latency = sum(batch["latency"] for batch in succeeded)
+        repos_per_second = sum(batch["size"] for batch in succeeded) / total_latency if total_latency else 0
+        return (f"{len(succeeded)} batches succeeded, {len(self.history) - len(succeeded)} failed, "
+                f"cost {total_cost}, {repos_per_second:.1f} repositories/s per query, final batch size {self.size}")
+
+
+@metrics.timed("github.get_repositories")
+def get_all_repositories_data_in_single_request(github_client: GitHubGraphQLClient, organization: str,
+                                                watermarks: Optional[Dict[str, dict]] = None,
+                                                discovery: str = "organization",
+                                                pushed_since: Optional[datetime.datetime] = None,
+                                                blob_cache: Optional[SQLiteCache] = None,
+                                                component_cache: Optional[SQLiteCache] = None) -> List[GraphQLRepoWrapper]:
+    """
+    Get all repositories data using ultra-optimized GraphQL requests.
+    Discovery and enrichment (tags, workflow files, package.json) are pipelined:
+    with discovery="search" every search page already carries the enrichment fields,
+    with discovery="organization" each listed page is enriched in aliased batches while
+    the next page is being fetched. Page and batch sizes adapt to latency and failures
+    (see AdaptiveBatchSizer), failed batches are bisected and retried.
+    Repositories without tags newer than their watermark (see keboola_utils.load_repository_watermarks) are skipped.
+    Workflow and package.json texts are fetched by blob OID in a second phase, skipping blobs found in blob_cache
+    and repositories whose component names are found in component_cache.
+    Raises RepositoryDiscoveryError (carrying the repositories fetched so far) if discovery did not finish.
+    """
+    return github_client.run(get_all_repositories_data_async(github_client, organization, watermarks, discovery,
+                                                             pushed_since, blob_cache, component_cache))
+
+
+async def get_all_repositories_data_async(github_client: GitHubGraphQLClient, organization: str,
+                                          watermarks: Optional[Dict[str, dict]] = None,
+                                          discovery: str = "organization",
+                                          pushed_since: Optional[datetime.datetime] = None,
+                                          blob_cache: Optional[SQLiteCache] = None,
+                                          component_cache: Optional[SQLiteCache] = None) -> List[GraphQLRepoWrapper]:
+    """Async version of get_all_repositories_data_in_single_request()."""
+    logger.info(f"Finding repositories with ultra-optimized GraphQL pipeline ({discovery} discovery)...")
+
+    if discovery == "search":
+        sizer = AdaptiveBatchSizer(initial_size=SEARCH_DATA_PAGE_SIZE)
+    else:
+        sizer = AdaptiveBatchSizer()
+
+    try:
+        if discovery == "search":
+            all_processed_repos = await _search_repositories_data_async(github_client, organization, watermarks,
+                                                                        pushed_since, sizer, blob_cache, component_cache)
+        else:
+            all_processed_repos = await _list_repositories_data_async(github_client, organization, watermarks, sizer,
+                                                                      blob_cache, component_cache)
+    except RepositoryDiscoveryError as e:
+        logger.error(f"Repository discovery did not finish, {len(e.repositories)} repositories fetched: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Error getting repositories data with GraphQL: {e}")
+        logger.error(f"GraphQL repositories traceback:")
+        logger.error(traceback.format_exc())
+        raise RepositoryDiscoveryError(f"Error getting repositories data with GraphQL: {e}") from e
+
+    logger.info(f"Successfully processed all {len(all_processed_repos)} repositories ({sizer.summary()})")
+    return all_processed_repos
+
+
+async def _search_repositories_data_async(github_client: GitHubGraphQLClient, organization: str,
+                                          watermarks: Optional[Dict[str, dict]],
+                                          pushed_since: Optional[datetime.datetime],
+                                          sizer: AdaptiveBatchSizer,
+                                          blob_cache: Optional[SQLiteCache] = None,
+                                          component_cache: Optional[SQLiteCache] = None,
+                                          patterns: str = REPO_PATTERNS) -> List[GraphQLRepoWrapper]:
+    """
+    Search repositories with enrichment fields nested in the search nodes; patterns run concurrently.
+    GitHub matches `in:name` against whole words of the name, so repositories that contain a pattern
+    only inside a longer word are not found; names are re-checked locally as substrings of the patterns.
+    Raises RepositoryDiscoveryError with the repositories found so far if any search does not finish.
+    """
+    seen = set()
+
+    async def search(search_query):
+        processed_repos = []
+        logger.info(f"Searching repositories: {search_query}")
+        variables = {"query": search_query, "first": sizer.size, "after": None}
+        try:
+            async for search_data in _iter_pages_async(github_client, SEARCH_REPOSITORIES_DATA_QUERY, variables,
+                                                       lambda data: data["search"], sizer):
+                if variables["after"] is None:
+                    _check_search_limit(search_data, search_query)
+                page_repos = []
+                for repo_data in _matching_repository_nodes(search_data["nodes"], patterns):
+                    # Several patterns can find the same repository
+                    if repo_data["name"] in seen:
+                        continue
+                    seen.add(repo_data["name"])
+                    processed_repo = _process_single_repository_data(repo_data, github_client)
+                    if _accept_repository(processed_repo, watermarks):
+                        page_repos.append(processed_repo)
+                await _fetch_blob_texts_async(github_client, page_repos, blob_cache, component_cache)
+                processed_repos.extend(page_repos)
+        except Exception as e:
+            raise RepositoryDiscoveryError(f"Search '{search_query}' failed: {e}", processed_repos) from e
+        return processed_repos
+
+    results = await asyncio.gather(*(search(search_query) for search_query in _search_queries(organization, patterns, pushed_since)),
+                                   return_exceptions=True)
+    return _merge_discovery_results(results)
+
+
+async def _list_repositories_data_async(github_client: GitHubGraphQLClient, organization: str,
+                                        watermarks: Optional[Dict[str, dict]],
+                                        sizer: AdaptiveBatchSizer,
+                                        blob_cache: Optional[SQLiteCache] = None,
+                                        component_cache: Optional[SQLiteCache] = None,
+                                        patterns: str = REPO_PATTERNS) -> List[GraphQLRepoWrapper]:
+    """
+    List organization repositories and start enriching each page while the next one is fetched.
+    Each page is split by the current sizer.size, so later pages use the size learned from earlier batches.
+    Raises RepositoryDiscoveryError with the repositories fetched so far if listing or any batch fails.
+    """
+    batch_tasks = []
+    listing_error = None
+    variables = {"org": organization, "first": 100, "after": None}
+    try:
+        async for repositories in _iter_pages_async(github_client, REPOSITORIES_QUERY, variables,
+                                                    lambda data: (data["organization"] or {}).get("repositories")):
+            matching = _matching_repository_nodes(repositories["nodes"], patterns)
+            while matching:
+                batch, matching = matching[:sizer.size], matching[sizer.size:]
+                logger.info(f"Scheduling batch {len(batch_tasks) + 1} ({len(batch)} repositories)")
+                batch_tasks.append(asyncio.create_task(
+                    _process_repository_batch_async(github_client, batch, watermarks, sizer, blob_cache, component_cache)
+                ))
+    except Exception as e:
+        # Batches of the pages listed so far still finish, their repositories are kept
+        listing_error = RepositoryDiscoveryError(f"Listing repositories of {organization} failed: {e}")
+
+    # The client bounds how many batches are in flight at once; gather keeps batch order
+    batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
+    logger.info(f"Processed {len(batch_tasks)} batches")
+    if listing_error:
+        batch_results.append(listing_error)
+    return _merge_discovery_results(batch_results)
+
+
+async def _iter_pages_async(github, query: str, variables: dict, connection,
+                            sizer: Optional[AdaptiveBatchSizer] = None):
+    """
+    Yield the pages of a paginated connection; connection(data) selects it from the response.
+    variables["after"] is advanced in place, so it is None while the first page is processed.
+    Pages depend on the previous cursor, so they are fetched one after another.
+    With a sizer the page size ("first") adapts to latency and a failed page is retried
+    with a smaller size from the same cursor.
+    Raises RepositoryDiscoveryError when a page cannot be fetched, so the caller never
+    mistakes a truncated listing for a complete one.
+    """
+    has_next_page = True
+    while has_next_page:
+        if sizer:
+            variables["first"] = sizer.size
+        start = time.monotonic()
+        data = await github.execute_async(query, variables)
+        if data is None:
+            if sizer and variables["first"] > sizer.min_size:
+                sizer.record_failure(variables["first"], time.monotonic() - start)
+                continue
+            raise RepositoryDiscoveryError(f"GraphQL page could not be fetched for variables {variables}")
+        if sizer:
+            sizer.record(variables["first"], time.monotonic() - start, data.get("rateLimit"))
+
+        page = connection(data)
+        if not page:
+            raise RepositoryDiscoveryError(f"GraphQL connection not found for variables {variables}")
+
+        yield page
+
+        page_info = page["pageInfo"]
+        has_next_page = page_info["hasNextPage"]
+        if has_next_page:
+            variables["after"] = page_info["endCursor"]
+
+
+# Enrichment fields shared by the aliased batch query and the search pipeline
+REPOSITORY_DATA_FRAGMENT = """
+fragment RepositoryData on Repository {
+    name
+    nameWithOwner
+    url
+    isArchived
+    defaultBranchRef {
+        name
+    }
+    # Get recent tags
+    refs(first: 10, refPrefix: "refs/tags/", orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) {
+        nodes {
+            name
+            target {
+                ... on Commit {
+                    oid
+                    committedDate
+                }
+            }
+        }
+    }
+    # List workflow files, their text is fetched by OID in a second phase (see _fetch_blob_texts_async)
+    workflows: object(expression: "HEAD:.github/workflows") {
+        ... on Tree {
+            oid
+            entries {
+                name
+                type
+                oid
+                object {
+                    ... on Blob {
+                        byteSize
+                    }
+                }
+            }
+        }
+    }
+    # package.json blob, fetched by OID like the workflow files
+    packageJson: object(expression: "HEAD:package.json") {
+        ... on Blob {
+            oid
+            byteSize
+        }
+    }
+}
+"""
+
+
+def _build_repository_batch_query(repos: List[dict]) -> str:
+    """Build the mega query with aliases for each repository."""
+    query_parts = []
     
-    # Process repositories in batches of 50
-    batch_size = 50
-    total_batches = (len(all_repos) + batch_size - 1) // batch_size
+    for i, repo in enumerate(repos):
+        alias = f"repo{i}"
+        query_parts.append(f"""
+        {alias}: repository(owner: "{GITHUB_ORGANIZATION}", name: "{repo['name']}") {{
+            ...RepositoryData
+        }}
+        """)
     
-    for batch_num in range(total_batches):
-        start_idx = batch_num * batch_size
-        end_idx = min(start_idx + batch_size, len(all_repos))
-        batch_repos = all_repos[start_idx:end_idx]
-        
-        logger.info(f"Processing batch {batch_num + 1}/{total_batches} (repositories {start_idx + 1}-{end_idx})")
-        
-        # Process this batch
-        batch_processed_repos = _process_repository_batch(github_client, batch_repos)
-        all_processed_repos.extend(batch_processed_repos)
+    # Combine all parts
+    return f"""
+    query {{
+        {" ".join(query_parts)}
+        rateLimit {{
+            cost
+            remaining
+            resetAt
+        }}
+    }}
+    {REPOSITORY_DATA_FRAGMENT}
+    """
+
+
+def has_new_tags(tags: list, watermark: Optional[dict]) -> bool:
+    """Return True if there is no watermark or any tag is newer than the watermark."""
+    if not watermark:
+        return True
+    return any(tag.date > watermark['date'] for tag in tags)
+
+
+def _accept_repository(processed_repo: Optional[GraphQLRepoWrapper], watermarks: Optional[Dict[str, dict]]) -> bool:
+    """Return True for successfully processed repositories with tags newer than their watermark."""
+    if not processed_repo:
+        return False
+    if not has_new_tags(processed_repo.tags, (watermarks or {}).get(processed_repo.name)):
+        logger.info(f"No new tags in {processed_repo.name} since {watermarks[processed_repo.name]['tag']}, skipping")
+        return False
+    logger.info(f"Processed {processed_repo.name} with {len(processed_repo.tags)} tags, {len(processed_repo.workflow_files)} workflow files")
+    return True
+
+
+def _repository_field_handler(github_client: GitHubGraphQLClient):
+    """
+    Stream handler for the mega query: every repoN alias is turned into a wrapper as soon
+    as it has been downloaded, so the raw subtree is dropped right away.
+    """
+    def handle_field(alias, repo_data):
+        if alias.startswith("repo") and repo_data:
+            return _process_single_repository_data(repo_data, github_client)
+        return repo_data
+    return handle_field
+
+
+def _parse_repository_batch(data: dict, github_client: GitHubGraphQLClient, repos: List[dict],
+                            watermarks: Optional[Dict[str, dict]] = None) -> List[GraphQLRepoWrapper]:
+    """
+    Collect the repository wrappers of a streamed mega query response (see _repository_field_handler),
+    dropping repos without new tags.
+    """
+    processed_repos = []
+    for i, repo in enumerate(repos):
+        alias = f"repo{i}"
+        processed_repo = data.get(alias)
         
-        logger.info(f"Successfully processed batch {batch_num + 1}/{total_batches} ({len(batch_processed_repos)} repositories)")
+        if not processed_repo:
+            logger.warning(f"Repository {repo['name']} missing from the mega query response")
+            continue
+
+        if _accept_repository(processed_repo, watermarks):
+            processed_repos.append(processed_repo)
     
-    logger.info(f"Successfully processed all {len(all_processed_repos)} repositories in {total_batches} batches")
-    return all_processed_repos
+    return processed_repos
 
 
-def _process_repository_batch(github_client: dict, repos: List[dict]) -> List[GraphQLRepoWrapper]:
+async def _process_repository_batch_async(github_client: GitHubGraphQLClient, repos: List[dict],
+                                          watermarks: Optional[Dict[str, dict]] = None,
+                                          sizer: Optional[AdaptiveBatchSizer] = None,
+                                          blob_cache: Optional[SQLiteCache] = None,
+                                          component_cache: Optional[SQLiteCache] = None) -> List[GraphQLRepoWrapper]:
     """
     Process a batch of repositories using ultra-optimized single GraphQL request.
+    Repositories whose tags are not newer than their watermark are left out.
+    A failed batch is split in halves that are retried concurrently; repositories that fail on their own
+    are reported with RepositoryDiscoveryError, which carries the repositories that were fetched.
     """
+    sizer = sizer or AdaptiveBatchSizer()
     logger.info(f"Executing mega GraphQL query for {len(repos)} repositories...")
     
-    # Build the mega query with aliases for each repository
+    start = time.monotonic()
+    with metrics.timer("github.repository_batch") as operation:
+        try:
+            data = await github_client.execute_async(_build_repository_batch_query(repos),
+                                                     handle_field=_repository_field_handler(github_client))
+        except Exception as e:
+            logger.error(f"Error executing mega GraphQL query: {e}")
+            data = None
+        operation.error = data is None
+
+    if data is None:
+        sizer.record_failure(len(repos), time.monotonic() - start)
+        if len(repos) == 1:
+            logger.error(f"Giving up on repository {repos[0]['name']}")
+            raise RepositoryDiscoveryError(f"Repository {repos[0]['name']} could not be fetched")
+        middle = len(repos) // 2
+        halves = await asyncio.gather(
+            _process_repository_batch_async(github_client, repos[:middle], watermarks, sizer, blob_cache, component_cache),
+            _process_repository_batch_async(github_client, repos[middle:], watermarks, sizer, blob_cache, component_cache),
+            return_exceptions=True
+        )
+        return _merge_discovery_results(halves)
+
+    sizer.record(len(repos), time.monotonic() - start, data.get("rateLimit"))
+    processed_repos = _parse_repository_batch(data, github_client, repos, watermarks)
+    await _fetch_blob_texts_async(github_client, processed_repos, blob_cache, component_cache)
+    return processed_repos
+
+
+# Limits of one blob text query (phase two of the repository fetch)
+BLOB_QUERY_MAX_BYTES = 2 * 1024 * 1024
+BLOB_QUERY_MAX_BLOBS = 100
+
+
+def _blob_cache_key(oid: str) -> str:
+    return f"blob:{oid}"
+
+
+def component_names_cache_key(repo) -> Optional[str]:
+    """
+    Key of the resolved component names of a repository: its name plus the OIDs of the
+    workflows tree and package.json, so any change of those files invalidates the entry.
+    """
+    if not isinstance(repo, RepoSnapshot):
+        return None
+    return f"components:{repo.full_name}:{repo.workflows_oid}:{repo.package_json_oid}"
+
+
+def component_names_cache_slot(key: str) -> str:
+    """Repository part of a component_names_cache_key, so a StateCache keeps one entry per repository."""
+    return key.rsplit(':', 2)[0]
+
+
+def _load_cached_component_names(repos: List[GraphQLRepoWrapper], component_cache: Optional[SQLiteCache]) -> None:
+    """Set component_names of repositories whose workflow and package.json OIDs are unchanged."""
+    if component_cache is None:
+        return
+    for repo in repos:
+        cached = component_cache.get(component_names_cache_key(repo))
+        if cached is not None:
+            repo.component_names = cached
+
+
+def _pending_blobs(repos: List[GraphQLRepoWrapper], blob_cache: Optional[SQLiteCache]) -> List[tuple]:
+    """
+    Fill blob texts available in blob_cache and return (repo, blob) pairs that still need fetching.
+    Blob OIDs are content hashes, so a cached text never goes stale.
+    Repositories with known component names need no blob texts.
+    """
+    pending = []
+    for repo in repos:
+        if repo.component_names is not None:
+            continue
+        blobs = list(repo.workflow_files)
+        if repo.package_json_blob:
+            blobs.append(repo.package_json_blob)
+        for blob in blobs:
+            if blob["content"] is not None or not blob.get("oid"):
+                continue
+            cached = blob_cache.get(_blob_cache_key(blob["oid"])) if blob_cache is not None else None
+            if cached is not None:
+                blob["content"] = cached
+            else:
+                pending.append((repo, blob))
+    return pending
+
+
+def _blob_chunks(pending: List[tuple]) -> List[List[tuple]]:
+    """Split pending blobs into queries of at most BLOB_QUERY_MAX_BLOBS blobs / BLOB_QUERY_MAX_BYTES bytes."""
+    chunks, chunk, chunk_bytes = [], [], 0
+    for repo, blob in pending:
+        if chunk and (len(chunk) >= BLOB_QUERY_MAX_BLOBS or chunk_bytes + blob["size"] > BLOB_QUERY_MAX_BYTES):
+            chunks.append(chunk)
+            chunk, chunk_bytes = [], 0
+        chunk.append((repo, blob))
+        chunk_bytes += blob["size"]
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _build_blob_text_query(chunk: List[tuple]) -> str:
+    """Build an aliased query fetching blob texts by OID."""
     query_parts = []
-    variables = {}
-    
-    for i, repo in enumerate(repos):
-        alias = f"repo{i}"
+    for i, (repo, blob) in enumerate(chunk):
+        owner, name = repo.full_name.split('/', 1)
         query_parts.append(f"""
-        {alias}: repository(owner: "{GITHUB_ORGANIZATION}", name: "{repo['name']}") {{
-            name
-            nameWithOwner
-            url
-            defaultBranchRef {{
-                name
-            }}
-            # Get recent tags
-            refs(first: 10, refPrefix: "refs/tags/", orderBy: {{field: TAG_COMMIT_DATE, direction: DESC}}) {{
-                nodes {{
-                    name
-                    target {{
-                        ... on Commit {{
-                            oid
-                            committedDate
-                        }}
-                    }}
-                }}
-            }}
-            # Get workflow files content
-            workflows: object(expression: "HEAD:.github/workflows") {{
-                ... on Tree {{
-                    entries {{
-                        name
-                        type
-                        object {{
-                            ... on Blob {{
-                                text
-                            }}
-                        }}
-                    }}
-                }}
-            }}
-            # Get package.json content
-            packageJson: object(expression: "HEAD:package.json") {{
+        blob{i}: repository(owner: "{owner}", name: "{name}") {{
+            object(oid: "{blob['oid']}") {{
                 ... on Blob {{
                     text
                 }}
             }}
         }}
         """)
-    
-    # Combine all parts
-    query = f"""
+    return f"""
     query {{
         {" ".join(query_parts)}
     }}
     """
-    
-    try:
-        # Execute the query
-        response = requests.post(
-            github_client['url'],
-            json={'query': query},
-            headers=github_client['headers']
-        )
-        
-        if response.status_code != 200:
-            logger.error(f"GraphQL query failed: {response.status_code} - {response.text}")
-            return []
-        
-        data = response.json()
-        
-        if 'errors' in data:
-            logger.error(f"GraphQL errors: {data['errors']}")
-            return []
-        
-        # Process results
-        processed_repos = []
-        for i, repo in enumerate(repos):
-            alias = f"repo{i}"
-            repo_data = data['data'].get(alias)
-            
-            if repo_data:
-                processed_repo = _process_single_repository_data(repo_data, github_client)
-                if processed_repo:
-                    processed_repos.append(processed_repo)
-                    logger.info(f"Processed {repo['name']} with {len(processed_repo._tags)} tags, {len(processed_repo._workflow_files)} workflow files")
-        
-        return processed_repos
-        
-    except Exception as e:
-        logger.error(f"Error executing mega GraphQL query: {e}")
-        return []
 
 
-def get_repositories(github, organization=GITHUB_ORGANIZATION, patterns=REPO_PATTERNS):
-    """Get list of repositories based on pattern using GraphQL."""
-    logger.info("Finding repositories with GraphQL...")
-    repos = []
+def _apply_blob_texts(data: Optional[dict], chunk: List[tuple], blob_cache: Optional[SQLiteCache]) -> None:
+    """Store fetched texts on their blobs and in blob_cache."""
+    for i, (repo, blob) in enumerate(chunk):
+        blob_object = ((data or {}).get(f"blob{i}") or {}).get("object") or {}
+        if blob_object.get("text") is None:
+            logger.warning(f"Could not fetch {blob['path']} of {repo.name}")
+            continue
+        blob["content"] = blob_object["text"]
+        if blob_cache is not None:
+            blob_cache.set(_blob_cache_key(blob["oid"]), blob["content"])
 
-    try:
-        # GraphQL query to get repositories
-        query = """
-        query($org: String!, $first: Int!, $after: String) {
-            organization(login: $org) {
-                repositories(first: $first, after: $after) {
-                    nodes {
-                        name
-                        nameWithOwner
-                        url
-                        defaultBranchRef {
-                            name
-                        }
-                    }
-                    pageInfo {
-                        hasNextPage
-                        endCursor
-                    }
+
+def _finish_blob_texts(repos: List[GraphQLRepoWrapper]) -> None:
+    """Drop workflow files whose text could not be fetched and expose the package.json text."""
+    for repo in repos:
+        if repo.component_names is not None:
+            continue
+        repo.blob_texts_complete = (all(file["content"] is not None for file in repo.workflow_files)
+                                    and (not repo.package_json_blob or repo.package_json_blob["content"] is not None))
+        repo.workflow_files = [file for file in repo.workflow_files if file["content"] is not None]
+        if repo.package_json is None and repo.package_json_blob:
+            repo.package_json = repo.package_json_blob["content"]
+
+
+async def _fetch_blob_texts_async(github_client: GitHubGraphQLClient, repos: List[GraphQLRepoWrapper],
+                                  blob_cache: Optional[SQLiteCache] = None,
+                                  component_cache: Optional[SQLiteCache] = None) -> None:
+    """
+    Phase two of the repository fetch: download workflow and package.json texts by blob OID.
+    Only blobs missing from blob_cache are transferred, repositories whose component names
+    are in component_cache are skipped entirely. Chunks are fetched concurrently.
+    """
+    _load_cached_component_names(repos, component_cache)
+    pending = _pending_blobs(repos, blob_cache)
+
+    async def fetch(chunk):
+        try:
+            _apply_blob_texts(await github_client.execute_async(_build_blob_text_query(chunk)), chunk, blob_cache)
+        except Exception as e:
+            logger.error(f"Error fetching blob texts: {e}")
+
+    await asyncio.gather(*(fetch(chunk) for chunk in _blob_chunks(pending)))
+    if pending:
+        logger.info(f"Fetched {len(pending)} blob texts for {len(repos)} repositories")
+    _finish_blob_texts(repos)
+
+
+REPOSITORIES_QUERY = """
+query($org: String!, $first: Int!, $after: String) {
+    organization(login: $org) {
+        repositories(first: $first, after: $after) {
+            nodes {
+                name
+                nameWithOwner
+                url
+                isArchived
+                defaultBranchRef {
+                    name
                 }
             }
+            pageInfo {
+                hasNextPage
+                endCursor
+            }
         }
-        """
-        
-        variables = {
-            "org": organization,
-            "first": 100,
-            "after": None
+    }
+}
+"""
+
+
+def _matches_patterns(repo_name: str, patterns: str) -> bool:
+    """Check if repo name contains any of the comma separated patterns (case insensitive)."""
+    for pattern in patterns.split(','):
+        if pattern.strip().lower() in repo_name.lower():
+            return True
+    return False
+
+
+def _matching_repository_nodes(nodes: list, patterns: str) -> list:
+    """Return the repository nodes of one page whose name matches the patterns."""
+    # Search results may contain non-repository nodes, archived repositories are never released
+    return [repo for repo in nodes
+            if repo and not repo.get("isArchived") and _matches_patterns(repo["name"], patterns)]
+
+
+SEARCH_REPOSITORIES_DATA_QUERY = """
+query($query: String!, $first: Int!, $after: String) {
+    search(type: REPOSITORY, query: $query, first: $first, after: $after) {
+        repositoryCount
+        nodes {
+            ... on Repository {
+                pushedAt
+                ...RepositoryData
+            }
         }
-        
-        # Get all repositories (handle pagination)
-        has_next_page = True
-        while has_next_page:
-            response = requests.post(
-                github["url"], 
-                json={"query": query, "variables": variables}, 
-                headers=github["headers"]
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"GraphQL API error: {response.status_code} - {response.text}")
-                break
-                
-            data = response.json()
-            if "errors" in data:
-                logger.error(f"GraphQL errors: {data['errors']}")
-                break
-                
-            org_data = data["data"]["organization"]
-            if not org_data:
-                logger.error(f"Organization {organization} not found")
-                break
-                
-            # Filter repositories by pattern
-            for repo in org_data["repositories"]["nodes"]:
-                repo_name = repo["name"]
-                
-                # Check if repo name matches any pattern
-                matches_pattern = False
-                for pattern in patterns.split(','):
-                    if pattern.strip().lower() in repo_name.lower():
-                        matches_pattern = True
-                        break
-                
-                if matches_pattern:
-                    # Create repo object similar to PyGithub
-                    repo_data = {
-                        "name": repo["name"],
-                        "full_name": repo["nameWithOwner"],
-                        "url": repo["url"],
-                        "default_branch": repo["defaultBranchRef"]["name"] if repo["defaultBranchRef"] else "main",
-                        "_github_client": github  # Add GitHub client for other functions
-                    }
-                    repos.append(GraphQLRepoWrapper(repo_data, github))
-            
-            # Handle pagination
-            page_info = org_data["repositories"]["pageInfo"]
-            has_next_page = page_info["hasNextPage"]
-            if has_next_page:
-                variables["after"] = page_info["endCursor"]
-        
-        logger.info(f"Found {len(repos)} repositories matching pattern '{patterns}'")
-        return repos
-        
-    except Exception as e:
-        logger.error(f"Error getting repositories with GraphQL: {e}")
-        logger.error(f"GraphQL repositories traceback:")
-        logger.error(traceback.format_exc())
-        return []
+        pageInfo {
+            hasNextPage
+            endCursor
+        }
+    }
+    rateLimit {
+        cost
+        remaining
+        resetAt
+    }
+}
+""" + REPOSITORY_DATA_FRAGMENT
+
+# Search pages with nested tags and blob texts are heavy, so they are smaller than discovery-only pages
+SEARCH_DATA_PAGE_SIZE = 25
+
+# The search API returns at most this many results for one query
+SEARCH_RESULTS_LIMIT = 1000
+
+
+def _search_queries(organization: str, patterns: str, pushed_since: Optional[datetime.datetime]) -> List[str]:
+    """Build one search query string per repository name pattern."""
+    qualifiers = f"org:{organization} in:name archived:false"
+    if pushed_since:
+        qualifiers += f" pushed:>={fix_timezone(pushed_since).astimezone(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}"
+    return [f"{pattern.strip()} {qualifiers}" for pattern in patterns.split(',') if pattern.strip()]
+
+
+def _check_search_limit(search_data: dict, search_query: str) -> None:
+    if search_data["repositoryCount"] > SEARCH_RESULTS_LIMIT:
+        logger.warning(f"Search '{search_query}' matched {search_data['repositoryCount']} repositories, "
+                       f"only the first {SEARCH_RESULTS_LIMIT} are returned - use organization discovery")
 
 
 def fix_timezone(date):
@@ -450,39 +952,64 @@ def fix_timezone(date):
     return date
 
 
+TAGS_QUERY = """
+query($owner: String!, $name: String!, $first: Int!) {
+    repository(owner: $owner, name: $name) {
+        refs(first: $first, refPrefix: "refs/tags/", orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) {
+            nodes {
+                name
+                target {
+                    ... on Commit {
+                        oid
+                        committedDate
+                        message
+                        url
+                    }
+                }
+            }
+        }
+    }
+}
+"""
+
+
+def _parse_repo_tags(repo, data) -> List[Tag]:
+    """Convert the tags query response into Tag objects."""
+    all_tags = []
+    if data is None:
+        return all_tags
+
+    repo_data = data["repository"]
+    if not repo_data:
+        logger.error(f"Repository {repo.name} not found")
+        return all_tags
+    
+    # Process tags
+    for ref in repo_data["refs"]["nodes"]:
+        if ref["target"]:
+            commit = ref["target"]
+            all_tags.append(Tag(
+                name=ref["name"],
+                commit=commit["oid"],
+                date=parse_github_datetime(commit["committedDate"]),
+                message=commit["message"],
+                url=commit["url"]
+            ))
+    
+    logger.info(f"Fetched {len(all_tags)} tags for {repo.name}")
+    return all_tags
+
+
 def get_repo_tags(repo, max_count=10):
     """Get the most recent tags for a repository using GraphQL."""
     # If we have pre-fetched tags, use them
-    if hasattr(repo, '_tags') and repo._tags:
+    if isinstance(repo, RepoSnapshot) and repo.tags:
         logger.info(f"Using pre-fetched tags for {repo.name}")
-        return repo._tags[:max_count]
+        return repo.tags[:max_count]
     
     logger.info(f"Fetching {max_count} most recent tags for {repo.name} with GraphQL")
 
-    all_tags = []
-    
     try:
-        # GraphQL query to get tags
-        query = """
-        query($owner: String!, $name: String!, $first: Int!) {
-            repository(owner: $owner, name: $name) {
-                refs(first: $first, refPrefix: "refs/tags/", orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) {
-                    nodes {
-                        name
-                        target {
-                            ... on Commit {
-                                oid
-                                committedDate
-                                message
-                                url
-                            }
-                        }
-                    }
-                }
-            }
-        }
-        """
-        
         variables = {
             "owner": GITHUB_ORGANIZATION,
             "name": repo.name,
@@ -490,50 +1017,12 @@ def get_repo_tags(repo, max_count=10):
         }
         
         # Get GitHub client from repo object
-        github_client = repo._github_client
-        
-        response = requests.post(
-            github_client["url"], 
-            json={"query": query, "variables": variables}, 
-            headers=github_client["headers"]
-        )
-        
-        if response.status_code != 200:
-            logger.error(f"GraphQL API error: {response.status_code} - {response.text}")
-            return all_tags
-            
-        data = response.json()
-        if "errors" in data:
-            logger.error(f"GraphQL errors: {data['errors']}")
-            return all_tags
-        
-        repo_data = data["data"]["repository"]
-        if not repo_data:
-            logger.error(f"Repository {repo.name} not found")
-            return all_tags
-        
-        # Process tags
-        for ref in repo_data["refs"]["nodes"]:
-            if ref["target"]:
-                commit = ref["target"]
-                commit_date = datetime.datetime.fromisoformat(commit["committedDate"].replace('Z', '+00:00'))
-                
-                tag_obj = {
-                    'name': ref["name"],
-                    'commit': commit["oid"],
-                    'date': fix_timezone(commit_date),
-                    'message': commit["message"],
-                    'url': commit["url"]
-                }
-                
-                all_tags.append(tag_obj)
-        
-        logger.info(f"Fetched {len(all_tags)} tags for {repo.name}")
-        return all_tags
+        data = repo.github_client.execute(TAGS_QUERY, variables)
+        return _parse_repo_tags(repo, data)
         
     except Exception as e:
         logger.error(f"Error getting tags for {repo.name}: {e}")
-        return all_tags
+        return []
 
 
 def get_tags_in_period(repo, start_date, end_date):
@@ -556,20 +1045,133 @@ def get_tags_in_period(repo, start_date, end_date):
 
     for tag in all_tags:
         # Skip if tag doesn't match semantic versioning
-        if not semver_pattern.match(tag['name']):
+        if not semver_pattern.match(tag.name):
             continue
 
         # Check if the tag is within our date range
-        if start_date <= tag['date'] <= end_date:
+        if start_date <= tag.date <= end_date:
             tags_in_period.append(tag)
 
     logger.info(f"Found {len(tags_in_period)} tags in period for {repo.name}")
     return tags_in_period
 
 
-def get_changes_between_tags(repo, previous_tag, current_tag):
-    """Get changes between two tags using GraphQL."""
-    logger.info(f"Getting changes between {previous_tag['name']} and {current_tag['name']} in {repo.name}")
+# Node budget for one aliased range-walk document (sum of the requested history page sizes)
+MAX_COMPARE_QUERY_NODES = 2500
+
+_OID_PATTERN = re.compile(r'^[0-9a-f]{40}$')
+
+# Part of the compare cache key; bumped when CommitRangeWalker changes which commits belong to a range
+COMPARE_CACHE_VERSION = 3
+
+
+def compare_cache_key(repo_name: str, base: str, head: str) -> Optional[str]:
+    """Cache key of a commit range, or None when base/head are not immutable commit OIDs."""
+    if _OID_PATTERN.match(base) and _OID_PATTERN.match(head):
+        return f"v{COMPARE_CACHE_VERSION}:{GITHUB_ORGANIZATION}/{repo_name}:{base}:{head}"
+    return None
+
+
+@metrics.timed("github.compare_many")
+def compare_many(github_client: GitHubGraphQLClient, ranges: List[tuple],
+                 max_query_nodes: int = MAX_COMPARE_QUERY_NODES, cache=None) -> Dict[tuple, Optional[GraphQLComparison]]:
+    """
+    Resolve many commit ranges with a few aliased GraphQL documents.
+    Takes a list of (repo, previous_tag, current_tag) triples and returns a dict keyed by
+    (repo name, previous tag commit, current tag commit).
+    Ranges found in the optional compare cache (SQLiteCache) are not fetched again.
+    """
+    if not ranges:
+        return {}
+    return github_client.run(compare_many_async(github_client, ranges, max_query_nodes, cache))
+
+
+async def compare_many_async(github_client: GitHubGraphQLClient, ranges: List[tuple],
+                             max_query_nodes: int = MAX_COMPARE_QUERY_NODES, cache=None) -> Dict[tuple, Optional[GraphQLComparison]]:
+    """
+    Async version of compare_many().
+    All ranges advance one page per round; ranges that are not complete yet (or fell back
+    from compare to the history walk) continue with the next page in the following round.
+    """
+    # Several component jobs can share the same repository, so drop duplicate ranges first
+    walkers = {}
+    for repo, previous_tag, current_tag in ranges:
+        walkers.setdefault((repo.name, previous_tag.commit, current_tag.commit),
+                           CommitRangeWalker(repo, previous_tag.commit, current_tag.commit,
+                                             tag_ref(previous_tag.name), tag_ref(current_tag.name)))
+    walkers = list(walkers.values())
+
+    # Ranges between immutable commits never change, so cached ones are complete already
+    cached_keys = set()
+    if cache is not None:
+        for walker in walkers:
+            cache_key = compare_cache_key(*walker.key)
+            cached_commits = cache.get(cache_key) if cache_key else None
+            if cached_commits is not None:
+                walker.commits = cached_commits
+                walker.done = True
+                cached_keys.add(walker.key)
+        logger.info(f"Found {len(cached_keys)} of {len(walkers)} commit ranges in the compare cache")
+
+    async def walk_chunk(chunk):
+        try:
+            data = await github_client.execute_async(*_build_range_walk_query(chunk))
+        except Exception as e:
+            logger.error(f"Error in batched GraphQL compare: {e}")
+            data = None
+
+        if data is None:
+            # One missing commit fails the whole document, so walk this chunk range by range
+            logger.warning(f"Batched compare failed for {len(chunk)} ranges, falling back to single range walks")
+            for walker in chunk:
+                try:
+                    while not walker.done:
+                        single_data = await github_client.execute_async(*_build_range_walk_query([walker]))
+                        walker.apply_page(single_data.get("range0") if single_data else None)
+                except Exception as e:
+                    logger.error(f"Error in GraphQL compare for {walker.repo.name}: {e}")
+                    walker.failed = True
+                    walker.done = True
+            return
+
+        for i, walker in enumerate(chunk):
+            walker.apply_page(data.get(f"range{i}"))
+
+    pending = [walker for walker in walkers if not walker.done]
+    round_number = 0
+    while pending:
+        round_number += 1
+
+        # Chunk by the number of history nodes requested in this round
+        chunks = [[]]
+        chunk_nodes = 0
+        for walker in pending:
+            if chunks[-1] and chunk_nodes + walker.page_size > max_query_nodes:
+                chunks.append([])
+                chunk_nodes = 0
+            chunks[-1].append(walker)
+            chunk_nodes += walker.page_size
+
+        logger.info(f"Compare round {round_number}: walking {len(pending)} commit ranges in {len(chunks)} batched GraphQL queries")
+        await asyncio.gather(*(walk_chunk(chunk) for chunk in chunks))
+        pending = [walker for walker in pending if not walker.done]
+
+    if cache is not None:
+        for walker in walkers:
+            cache_key = compare_cache_key(*walker.key)
+            if cache_key and not walker.failed and walker.key not in cached_keys:
+                cache.set(cache_key, walker.commits)
+
+    return {walker.key: walker.comparison() for walker in walkers}
+
+
+def get_changes_between_tags(repo, previous_tag, current_tag, comparison=None, cache=None):
+    """
+    Get changes between two tags using GraphQL.
+    A comparison already resolved by compare_many() can be passed to skip the network call;
+    otherwise the optional compare cache (SQLiteCache) is consulted before fetching.
+    """
+    logger.info(f"Getting changes between {previous_tag.name} and {current_tag.name} in {repo.name}")
 
     # Initialize result
     result = {
@@ -578,8 +1180,18 @@ def get_changes_between_tags(repo, previous_tag, current_tag):
     }
 
     try:
-        # Use the compare method from GraphQLRepoWrapper
-        comparison = repo.compare(previous_tag['commit'], current_tag['commit'])
+        # Use the compare method from GraphQLRepoWrapper unless the range was resolved in a batch or cached
+        cache_key = compare_cache_key(repo.name, previous_tag.commit, current_tag.commit) if cache is not None else None
+        if comparison is None and cache_key:
+            cached_commits = cache.get(cache_key)
+            if cached_commits is not None:
+                comparison = GraphQLComparison(cached_commits)
+
+        if comparison is None:
+            comparison = repo.compare(previous_tag.commit, current_tag.commit,
+                                      tag_ref(previous_tag.name), tag_ref(current_tag.name))
+            if comparison is not None and cache_key:
+                cache.set(cache_key, comparison.commits)
         
         if comparison is None:
             logger.error(f"Failed to get comparison for {repo.name}")
@@ -603,25 +1215,17 @@ def get_changes_between_tags(repo, previous_tag, current_tag):
                 if len(message_lines) > 1:
                     pr_title = message_lines[1].strip()
 
-            # Create change entry
-            change = {
-                'commit_sha': commit["sha"],
-                'commit_url': f"https://github.com/{GITHUB_ORGANIZATION}/{repo.name}/commit/{commit['sha']}",
-                'commit_message': commit["message"],
-                'author': commit["author"]["name"] if commit["author"] else "Unknown",
-                'date': fix_timezone(datetime.datetime.fromisoformat(commit["author"]["date"].replace('Z', '+00:00'))) if commit["author"] and commit["author"]["date"] else None
-            }
-
-            # Add PR info if available
-            if pr_number:
-                change['pr_number'] = pr_number
-                change['pr_url'] = f"https://github.com/{repo.full_name}/pull/{pr_number}"
-                change['title'] = pr_title if pr_title else f"PR #{pr_number}"
-            else:
-                change['title'] = commit["message"].split('\n')[0]
-
-            # Add to changes list
-            result['changes'].append(change)
+            # Create change entry, with PR info if available
+            result['changes'].append(Change(
+                commit_sha=commit["sha"],
+                commit_url=f"https://github.com/{GITHUB_ORGANIZATION}/{repo.name}/commit/{commit['sha']}",
+                commit_message=commit["message"],
+                author=commit["author"]["name"] if commit["author"] else "Unknown",
+                date=parse_github_datetime(commit["author"]["date"]) if commit["author"] and commit["author"]["date"] else None,
+                title=(pr_title or f"PR #{pr_number}") if pr_number else commit["message"].split('\n')[0],
+                pr_number=pr_number,
+                pr_url=f"https://github.com/{repo.full_name}/pull/{pr_number}" if pr_number else None
+            ))
 
         # Remove duplicates (sometimes the same PR can appear twice)
         unique_changes = []
@@ -629,12 +1233,12 @@ def get_changes_between_tags(repo, previous_tag, current_tag):
 
         for change in result['changes']:
             # If it's a PR and we've seen it, skip
-            if 'pr_number' in change and change['pr_number'] in seen_prs:
+            if change.pr_number and change.pr_number in seen_prs:
                 continue
 
             # If it's a PR, mark as seen
-            if 'pr_number' in change:
-                seen_prs.add(change['pr_number'])
+            if change.pr_number:
+                seen_prs.add(change.pr_number)
 
             # Add to unique changes
             unique_changes.append(change)
@@ -647,12 +1251,70 @@ def get_changes_between_tags(repo, previous_tag, current_tag):
     return result 
 
 
+WORKFLOW_TREE_QUERY = """
+query($owner: String!, $name: String!, $path: String!) {
+    repository(owner: $owner, name: $name) {
+        object(expression: $path) {
+            ... on Tree {
+                entries {
+                    name
+                    type
+                    object {
+                        ... on Tree {
+                            entries {
+                                name
+                                type
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+"""
+
+BLOB_TEXT_QUERY = """
+query($owner: String!, $name: String!, $path: String!) {
+    repository(owner: $owner, name: $name) {
+        object(expression: $path) {
+            ... on Blob {
+                text
+            }
+        }
+    }
+}
+"""
+
+
+def _path_variables(repo, path):
+    return {
+        "owner": GITHUB_ORGANIZATION,
+        "name": repo.name,
+        "path": f"{repo.default_branch}:{path}"
+    }
+
+
+def _tree_entries(data):
+    """Return tree entries from a tree query response, or None if the path does not exist."""
+    if data and data["repository"] and data["repository"]["object"]:
+        return data["repository"]["object"]["entries"]
+    return None
+
+
+def _blob_text(data):
+    """Return blob text from a blob query response, or None if the path does not exist."""
+    if data and data["repository"] and data["repository"]["object"]:
+        return data["repository"]["object"]["text"]
+    return None
+
+
 def get_workflow_files_content(repo, github_client):
     """Get content of all workflow files in .github directory using GraphQL."""
     # If we have pre-fetched workflow files, use them
-    if hasattr(repo, '_workflow_files') and repo._workflow_files:
+    if isinstance(repo, RepoSnapshot) and repo.workflow_files:
         logger.info(f"Using pre-fetched workflow files for {repo.name}")
-        return repo._workflow_files
+        return repo.workflow_files
     
     logger.info(f"Getting workflow files content for {repo.name} with GraphQL")
     
@@ -660,52 +1322,8 @@ def get_workflow_files_content(repo, github_client):
     
     try:
         # First, get the tree structure of .github directory
-        tree_query = """
-        query($owner: String!, $name: String!, $path: String!) {
-            repository(owner: $owner, name: $name) {
-                object(expression: $path) {
-                    ... on Tree {
-                        entries {
-                            name
-                            type
-                            object {
-                                ... on Tree {
-                                    entries {
-                                        name
-                                        type
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        }
-        """
-        
-        variables = {
-            "owner": GITHUB_ORGANIZATION,
-            "name": repo.name,
-            "path": f"{repo.default_branch}:.github"
-        }
-        
-        response = requests.post(
-            github_client["url"], 
-            json={"query": tree_query, "variables": variables}, 
-            headers=github_client["headers"]
-        )
-        
-        if response.status_code != 200:
-            logger.warning(f"Could not access .github directory for {repo.name}: {response.status_code}")
-            return workflow_files
-            
-        data = response.json()
-        if "errors" in data:
-            logger.warning(f"GraphQL errors for {repo.name}: {data['errors']}")
-            return workflow_files
-        
-        repo_data = data["data"]["repository"]
-        if not repo_data or not repo_data["object"]:
+        entries = _tree_entries(github_client.execute(WORKFLOW_TREE_QUERY, _path_variables(repo, ".github")))
+        if entries is None:
             logger.warning(f"No .github directory found for {repo.name}")
             return workflow_files
         
@@ -716,65 +1334,24 @@ def get_workflow_files_content(repo, github_client):
             for entry in entries:
                 if entry["type"] == "tree":
                     # Recursively get subdirectory contents
-                    sub_path = f"{repo.default_branch}:.github/{current_path}{entry['name']}"
-                    sub_variables = {
-                        "owner": GITHUB_ORGANIZATION,
-                        "name": repo.name,
-                        "path": sub_path
-                    }
-                    
-                    sub_response = requests.post(
-                        github_client["url"], 
-                        json={"query": tree_query, "variables": sub_variables}, 
-                        headers=github_client["headers"]
-                    )
-                    
-                    if sub_response.status_code == 200:
-                        sub_data = sub_response.json()
-                        if "data" in sub_data and sub_data["data"]["repository"]["object"]:
-                            collect_yml_files(
-                                sub_data["data"]["repository"]["object"]["entries"],
-                                f"{current_path}{entry['name']}/"
-                            )
+                    sub_path = f".github/{current_path}{entry['name']}"
+                    sub_entries = _tree_entries(github_client.execute(WORKFLOW_TREE_QUERY, _path_variables(repo, sub_path)))
+                    if sub_entries:
+                        collect_yml_files(sub_entries, f"{current_path}{entry['name']}/")
                 elif entry["type"] == "blob" and entry["name"].endswith(('.yml', '.yaml')):
                     yml_files.append(f".github/{current_path}{entry['name']}")
         
-        collect_yml_files(repo_data["object"]["entries"])
+        collect_yml_files(entries)
         
         # Get content of each .yml file
-        content_query = """
-        query($owner: String!, $name: String!, $path: String!) {
-            repository(owner: $owner, name: $name) {
-                object(expression: $path) {
-                    ... on Blob {
-                        text
-                    }
-                }
-            }
-        }
-        """
-        
         for file_path in yml_files:
             try:
-                file_variables = {
-                    "owner": GITHUB_ORGANIZATION,
-                    "name": repo.name,
-                    "path": f"{repo.default_branch}:{file_path}"
-                }
-                
-                file_response = requests.post(
-                    github_client["url"], 
-                    json={"query": content_query, "variables": file_variables}, 
-                    headers=github_client["headers"]
-                )
-                
-                if file_response.status_code == 200:
-                    file_data = file_response.json()
-                    if "data" in file_data and file_data["data"]["repository"]["object"]:
-                        workflow_files.append({
-                            "path": file_path,
-                            "content": file_data["data"]["repository"]["object"]["text"]
-                        })
+                content = _blob_text(github_client.execute(BLOB_TEXT_QUERY, _path_variables(repo, file_path)))
+                if content is not None:
+                    workflow_files.append({
+                        "path": file_path,
+                        "content": content
+                    })
                         
             except Exception as e:
                 logger.warning(f"Error getting content of {file_path}: {e}")
@@ -790,41 +1367,12 @@ def get_workflow_files_content(repo, github_client):
 def get_package_json_content(repo, github_client):
     """Get content of package.json file using GraphQL."""
     # If we have pre-fetched package.json, use it
-    if hasattr(repo, '_package_json') and repo._package_json:
+    if isinstance(repo, RepoSnapshot) and repo.package_json:
         logger.info(f"Using pre-fetched package.json for {repo.name}")
-        return repo._package_json
+        return repo.package_json
     
     try:
-        query = """
-        query($owner: String!, $name: String!, $path: String!) {
-            repository(owner: $owner, name: $name) {
-                object(expression: $path) {
-                    ... on Blob {
-                        text
-                    }
-                }
-            }
-        }
-        """
-        
-        variables = {
-            "owner": GITHUB_ORGANIZATION,
-            "name": repo.name,
-            "path": f"{repo.default_branch}:package.json"
-        }
-        
-        response = requests.post(
-            github_client["url"], 
-            json={"query": query, "variables": variables}, 
-            headers=github_client["headers"]
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            if "data" in data and data["data"]["repository"]["object"]:
-                return data["data"]["repository"]["object"]["text"]
-        
-        return None
+        return _blob_text(github_client.execute(BLOB_TEXT_QUERY, _path_variables(repo, "package.json")))
         
     except Exception as e:
         logger.warning(f"Error getting package.json for {repo.name}: {e}")
@@ -832,34 +1380,15 @@ def get_package_json_content(repo, github_client):
 
 
 def extract_component_names_from_workflow_files(workflow_files):
-    """Extract component names from workflow files using the same logic as component_utils.py."""
+    """Extract component names and vendors from workflow files using the shared component_utils scanner."""
     component_names = set()
     vendors = set()
     
     for file_data in workflow_files:
         try:
-            content = file_data["content"]
-            lines = content.split('\n')
-            
-            for line in lines:
-                if not line.strip():
-                    continue
-                    
-                # Find component identifiers - ensure values are on the same line
-                # Match patterns like: KEY: value, KEY: "value", KEY: 'value'
-                app_match = re.search(r'(?i)KBC_DEVELOPERPORTAL_APP\s*:\s*[\'"]?([a-zA-Z0-9._-]+)[\'"]?', line)
-                id_match = re.search(r'(?i)KBC_DEVELOPERPORTAL_ID\s*:\s*[\'"]?([a-zA-Z0-9._-]+)[\'"]?', line)
-                app_name_match = re.search(r'(?i)APP_NAME\s*:\s*[\'"]?([a-zA-Z0-9._-]+)[\'"]?', line)
-                vendor_match = re.search(r'(?i)KBC_DEVELOPERPORTAL_VENDOR\s*:\s*[\'"]?([a-zA-Z0-9._-]+)[\'"]?', line)
-                
-                # Add component matches
-                for match in [app_match, id_match, app_name_match]:
-                    if match and match.group(1) and not match.group(1).startswith('${{'):
-                        component_names.add(match.group(1))
-                
-                # Add vendor match
-                if vendor_match and vendor_match.group(1) and not vendor_match.group(1).startswith('${{'):
-                    vendors.add(vendor_match.group(1))
+            file_component_names, file_vendors = scan_component_identifiers(file_data["content"])
+            component_names.update(file_component_names)
+            vendors.update(file_vendors)
                     
         except Exception as e:
             logger.warning(f"Error processing workflow file {file_data['path']}: {e}")
@@ -970,7 +1499,26 @@ def get_component_name(repo, github_client):
     return list(final_component_names) 
 
 
-def _process_single_repository_data(repo_data: dict, github_client: dict) -> GraphQLRepoWrapper:
+def resolve_component_names(repo, github_client, cache=None):
+    """
+    Return the component names of a repository, reusing names cached for the same
+    workflows tree and package.json OIDs (see component_names_cache_key).
+    """
+    if getattr(repo, 'component_names', None) is not None:
+        logger.info(f"Using cached component names for {repo.name}")
+        return repo.component_names
+
+    component_names = get_component_name(repo, github_client)
+    key = component_names_cache_key(repo)
+    # Names resolved from incomplete blob texts are not cached, so they are recomputed next run
+    if cache is not None and key and getattr(repo, 'blob_texts_complete', False):
+        cache.set(key, component_names)
+    if isinstance(repo, GraphQLRepoWrapper):
+        repo.component_names = component_names
+    return component_names
+
+
+def _process_single_repository_data(repo_data: dict, github_client: GitHubGraphQLClient) -> GraphQLRepoWrapper:
     """
     Process single repository data from GraphQL response.
     """
@@ -981,44 +1529,52 @@ def _process_single_repository_data(repo_data: dict, github_client: dict) -> Gra
             for ref in repo_data["refs"]["nodes"]:
                 if ref.get("target"):
                     commit = ref["target"]
-                    commit_date = datetime.datetime.fromisoformat(commit["committedDate"].replace('Z', '+00:00'))
-                    
-                    tag_obj = {
-                        'name': ref["name"],
-                        'commit': commit["oid"],
-                        'date': fix_timezone(commit_date)
-                    }
-                    tags.append(tag_obj)
+                    tags.append(Tag(
+                        name=ref["name"],
+                        commit=commit["oid"],
+                        date=parse_github_datetime(commit["committedDate"])
+                    ))
         
-        # Process workflow files content
+        # Process workflow files; content is None until filled by _fetch_blob_texts_async
         workflow_files = []
         if repo_data.get("workflows") and repo_data["workflows"].get("entries"):
             for entry in repo_data["workflows"]["entries"]:
                 if entry["type"] == "blob" and entry["name"].endswith(('.yml', '.yaml')):
-                    if entry.get("object") and entry["object"].get("text"):
-                        workflow_files.append({
-                            "path": f".github/workflows/{entry['name']}",
-                            "content": entry["object"]["text"]
-                        })
+                    blob = entry.get("object") or {}
+                    workflow_files.append({
+                        "path": f".github/workflows/{entry['name']}",
+                        "oid": entry.get("oid"),
+                        "size": blob.get("byteSize", 0),
+                        "content": blob.get("text")
+                    })
         
         # Process package.json
         package_json = None
-        if repo_data.get("packageJson") and repo_data["packageJson"].get("text"):
-            package_json = repo_data["packageJson"]["text"]
+        package_json_blob = None
+        if repo_data.get("packageJson"):
+            package_json = repo_data["packageJson"].get("text")
+            if package_json is None and repo_data["packageJson"].get("oid"):
+                package_json_blob = {
+                    "path": "package.json",
+                    "oid": repo_data["packageJson"]["oid"],
+                    "size": repo_data["packageJson"].get("byteSize", 0),
+                    "content": None
+                }
         
         # Create complete repo object
-        complete_repo_data = {
-            "name": repo_data["name"],
-            "full_name": repo_data["nameWithOwner"],
-            "url": repo_data["url"],
-            "default_branch": repo_data["defaultBranchRef"]["name"] if repo_data.get("defaultBranchRef") else "main",
-            "_github_client": github_client,
-            "_tags": tags,
-            "_workflow_files": workflow_files,
-            "_package_json": package_json
-        }
-        
-        return GraphQLRepoWrapper(complete_repo_data, github_client)
+        return GraphQLRepoWrapper(
+            name=repo_data["name"],
+            full_name=repo_data["nameWithOwner"],
+            url=repo_data["url"],
+            default_branch=repo_data["defaultBranchRef"]["name"] if repo_data.get("defaultBranchRef") else "main",
+            tags=tags,
+            workflow_files=workflow_files,
+            package_json=package_json,
+            package_json_blob=package_json_blob,
+            workflows_oid=(repo_data.get("workflows") or {}).get("oid"),
+            package_json_oid=(repo_data.get("packageJson") or {}).get("oid"),
+            github_client=github_client
+        )
         
     except Exception as e:
         logger.error(f"Error processing repository data for {repo_data.get('name', 'unknown')}: {e}")
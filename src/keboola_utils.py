@@ -2,10 +2,15 @@
 """
 Keboola-specific utilities for table operations and state management.
 """
+import csv
 import datetime
+import os
+import threading
 from typing import Optional, List, Dict, Any
 from keboola.component import CommonInterface
 from src.config import logger
+from src.metrics_utils import METRICS_TABLE_COLUMNS, metrics
+from src.models import ReleaseEntry
 
 
 def detect_time_period_from_state(ci: CommonInterface, days: int = 30) -> tuple[datetime.datetime, datetime.datetime]:
@@ -33,33 +38,109 @@ def detect_time_period_from_state(ci: CommonInterface, days: int = 30) -> tuple[
         return start_date, today
 
 
-def update_state_file(ci: CommonInterface, last_processed_date: datetime.datetime) -> None:
-    """Update state file with last processed date."""
+def load_repository_watermarks(ci: CommonInterface) -> Dict[str, Dict[str, Any]]:
+    """
+    Load per-repository watermarks from the state file.
+    Returns {repo_name: {'tag': name, 'commit': oid, 'date': datetime}} for the newest tag seen in each repository.
+    """
+    watermarks = {}
     try:
         state = ci.get_state_file() or {}
-        state['last_processed_date'] = last_processed_date.isoformat()
+        for repo_name, watermark in (state.get('repositories') or {}).items():
+            try:
+                watermarks[repo_name] = {
+                    'tag': watermark.get('tag'),
+                    'commit': watermark.get('commit'),
+                    'date': datetime.datetime.fromisoformat(watermark['date'])
+                }
+            except Exception as e:
+                logger.warning(f"Ignoring invalid watermark for {repo_name}: {e}")
+        logger.info(f"Loaded watermarks for {len(watermarks)} repositories from state")
+    except Exception as e:
+        logger.warning(f"Error reading repository watermarks from state file: {e}")
+    return watermarks
+
+
+def load_component_catalog_snapshot(ci: CommonInterface) -> Optional[Dict[str, Any]]:
+    """
+    Load the component catalog snapshot stored by the previous run (see component_utils.load_component_catalog).
+    The snapshot lives in the state file because the data directory does not survive between runs.
+    """
+    try:
+        state = ci.get_state_file() or {}
+        snapshot = state.get('component_catalog')
+        if snapshot and isinstance(snapshot.get('components'), list):
+            logger.info(f"Loaded component catalog snapshot from state ({len(snapshot['components'])} components)")
+            return snapshot
+    except Exception as e:
+        logger.warning(f"Error reading component catalog snapshot from state file: {e}")
+    return None
+
+
+def load_component_names_snapshot(ci: CommonInterface) -> Dict[str, dict]:
+    """
+    Load the component names resolved by previous runs (the entries of a cache_utils.StateCache).
+    They live in the state file because the data directory does not survive between runs.
+    """
+    try:
+        state = ci.get_state_file() or {}
+        snapshot = state.get('component_names')
+        if isinstance(snapshot, dict):
+            return snapshot
+    except Exception as e:
+        logger.warning(f"Error reading component names from state file: {e}")
+    return {}
+
+
+def update_state_file(ci: CommonInterface, last_processed_date: Optional[datetime.datetime],
+                      repository_watermarks: Optional[Dict[str, Dict[str, Any]]] = None,
+                      component_catalog: Optional[Dict[str, Any]] = None,
+                      component_names: Optional[Dict[str, dict]] = None) -> None:
+    """
+    Update state file with last processed date, updated per-repository watermarks, the component catalog snapshot
+    and the resolved component names.
+    With last_processed_date, component_catalog or component_names None the values stored by the previous run are kept.
+    """
+    try:
+        state = ci.get_state_file() or {}
+        if last_processed_date is not None:
+            state['last_processed_date'] = last_processed_date.isoformat()
         state['last_run'] = datetime.datetime.now().isoformat()
+        if repository_watermarks:
+            repositories = state.get('repositories') or {}
+            for repo_name, watermark in repository_watermarks.items():
+                repositories[repo_name] = {
+                    'tag': watermark.get('tag'),
+                    'commit': watermark.get('commit'),
+                    'date': watermark['date'].isoformat()
+                }
+            state['repositories'] = repositories
+        if component_catalog is not None:
+            state['component_catalog'] = component_catalog
+        if component_names is not None:
+            state['component_names'] = component_names
         ci.write_state_file(state)
-        logger.info(f"Updated state file with date: {last_processed_date}")
+        logger.info(f"Updated state file with date: {state.get('last_processed_date')} "
+                    f"({len(repository_watermarks or {})} repository watermarks updated)")
     except Exception as e:
         logger.error(f"Error updating state file: {e}")
 
 
-def generate_release_note_content(entry: Dict[str, Any]) -> str:
+def generate_release_note_content(entry: ReleaseEntry) -> str:
     """Generate release note content in markdown format."""
-    content = f"""# {entry['component_name']} {entry['tag_name']}
+    content = f"""# {entry.component_name} {entry.tag_name}
 
-_Released on {entry['date'].strftime('%Y-%m-%d') if hasattr(entry['date'], 'strftime') else str(entry['date'])}_
+_Released on {entry.date.strftime('%Y-%m-%d') if hasattr(entry.date, 'strftime') else str(entry.date)}_
 
-**Component:** [{entry['component_name']}](https://github.com/keboola/{entry['repo_name']})  
-**Tag:** [{entry['tag_name']}]({entry['tag_url']})  
-**Stage:** {entry['component_stage']}
+**Component:** [{entry.component_name}](https://github.com/keboola/{entry.repo_name})  
+**Tag:** [{entry.tag_name}]({entry.tag_url})  
+**Stage:** {entry.component_stage}
 
 """
 
-    if entry.get('ai_description'):
+    if entry.ai_description:
         content += f"""## Change log (AI generated):
-{entry['ai_description']}
+{entry.ai_description}
 
 """
     else:
@@ -68,29 +149,29 @@ _Released on {entry['date'].strftime('%Y-%m-%d') if hasattr(entry['date'], 'strf
 
 """
 
-    if entry.get('changes'):
+    if entry.changes:
         content += "## Changes:\n"
         seen_titles = []
-        for change in entry['changes']:
-            if change.get('title') and change['title'] not in seen_titles:
-                change_line = f"- {change['title']}"
-                if change.get('number'):
-                    change_line += f" ([#{change['number']}]({change.get('url', '')}))"
+        for change in entry.changes:
+            if change.title and change.title not in seen_titles:
+                change_line = f"- {change.title}"
+                if change.pr_number:
+                    change_line += f" ([#{change.pr_number}]({change.pr_url or ''}))"
                 content += change_line + "\n"
-                seen_titles.append(change['title'])
+                seen_titles.append(change.title)
 
-        content += f"\n[Compare on GitHub](https://github.com/{entry['github_organization']}/{entry['repo_name']}/compare/{entry['previous_tag']}...{entry['tag_name']})\n\n"
+        content += f"\n[Compare on GitHub](https://github.com/{entry.github_organization}/{entry.repo_name}/compare/{entry.previous_tag}...{entry.tag_name})\n\n"
 
-    if entry.get('component_details'):
+    if entry.component_details:
         content += "## Component Information\n"
-        content += f"**Type:** {entry['component_details'].get('type', 'Unknown')}\n"
-        content += f"**Name:** {entry['component_details'].get('name', 'Unknown')}\n"
+        content += f"**Type:** {entry.component_details.get('type', 'Unknown')}\n"
+        content += f"**Name:** {entry.component_details.get('name', 'Unknown')}\n"
 
-        if entry['component_details'].get('description'):
-            content += f"**Description:** {entry['component_details']['description']}\n"
+        if entry.component_details.get('description'):
+            content += f"**Description:** {entry.component_details['description']}\n"
 
-        if entry['component_details'].get('documentationUrl'):
-            content += f"**Documentation:** [Link]({entry['component_details']['documentationUrl']})\n"
+        if entry.component_details.get('documentationUrl'):
+            content += f"**Documentation:** [Link]({entry.component_details['documentationUrl']})\n"
 
         content += "\n"
 
@@ -100,136 +181,160 @@ _Generated by Release Notes Generator on {datetime.datetime.now(datetime.timezon
     return content
 
 
-def save_release_to_table(ci: CommonInterface, release_data: Dict[str, Any], table_name: str = "releases") -> bool:
-    """Save a release to the Keboola table with generated content."""
-    logger.info(
-        f"Starting save_release_to_table for {release_data.get('component_name', 'unknown')} {release_data.get('tag_name', 'unknown')}")
+RELEASE_TABLE_COLUMNS = [
+    'release_date',
+    'component_id',
+    'component_stage',
+    'tag_name',
+    'previous_tag',
+    'repo_name',
+    'github_url',
+    'ai_summary',
+    'difference_link',
+    'developer_portal_link',
+    'component_type',
+    'component_description',
+    'documentation_url',
+    'release_note_content',
+    'generated_at',
+]
+
+
+def build_release_table_row(release_data: ReleaseEntry) -> Dict[str, Any]:
+    """Prepare one output table row (see RELEASE_TABLE_COLUMNS) for a release entry."""
+    # Generate release note content
+    logger.info(f"Generating release note content for {release_data.component_name} {release_data.tag_name}")
     try:
-        # Generate release note content
-        logger.info(
-            f"Generating release note content for {release_data.get('component_name', 'unknown')} {release_data.get('tag_name', 'unknown')}")
-        try:
-            release_content = generate_release_note_content(release_data)
-            logger.info(f"Generated release note content (length: {len(release_content)})")
-        except Exception as content_error:
-            logger.error(f"Error generating release note content: {content_error}")
-            raise
-
-                # Prepare data for table
-        table_data = {
-            'release_date': release_data['date'].isoformat() if hasattr(release_data['date'], 'isoformat') else str(
-                release_data['date']),
-            'component_id': release_data['component_name'],  # Changed from component_name to component_id
-            'component_stage': release_data['component_stage'],
-            'tag_name': release_data['tag_name'],
-            'previous_tag': release_data['previous_tag'],
-            'repo_name': release_data['repo_name'],
-            'github_url': release_data['tag_url'],
-            'ai_summary': release_data.get('ai_description',
-                                            'AI summary not available - AI model was not configured or failed to generate summary'),
-            'difference_link': f"https://github.com/{release_data.get('github_organization', 'keboola')}/{release_data['repo_name']}/compare/{release_data['previous_tag']}...{release_data['tag_name']}",
-            'developer_portal_link': f"https://components.keboola.com/components/{release_data['component_name']}",
-            'component_type': release_data.get('component_details', {}).get('type', ''),
-            'component_description': release_data.get('component_details', {}).get('description', ''),
-            'documentation_url': release_data.get('component_details', {}).get('documentationUrl', ''),
-            'release_note_content': release_content,
-            'generated_at': datetime.datetime.now().isoformat()
-        }
-
-        # Debug logging
-        logger.info(f"Preparing table data for {release_data['component_name']} {release_data['tag_name']}:")
-        logger.info(f"  - component_id: {table_data['component_id']}")
-        logger.info(f"  - difference_link: {table_data['difference_link']}")
-        logger.info(f"  - developer_portal_link: {table_data['developer_portal_link']}")
-
-        # Define table columns
-        columns = list(table_data.keys())
+        release_content = generate_release_note_content(release_data)
+        logger.info(f"Generated release note content (length: {len(release_content)})")
+    except Exception as content_error:
+        logger.error(f"Error generating release note content: {content_error}")
+        raise
+
+    component_details = release_data.component_details or {}
+    return {
+        'release_date': release_data.date.isoformat() if hasattr(release_data.date, 'isoformat') else str(
+            release_data.date),
+        'component_id': release_data.component_name,  # Changed from component_name to component_id
+        'component_stage': release_data.component_stage,
+        'tag_name': release_data.tag_name,
+        'previous_tag': release_data.previous_tag,
+        'repo_name': release_data.repo_name,
+        'github_url': release_data.tag_url,
+        'ai_summary': release_data.ai_description,
+        'difference_link': f"https://github.com/{release_data.github_organization or 'keboola'}/{release_data.repo_name}/compare/{release_data.previous_tag}...{release_data.tag_name}",
+        'developer_portal_link': f"https://components.keboola.com/components/{release_data.component_name}",
+        'component_type': component_details.get('type', ''),
+        'component_description': component_details.get('description', ''),
+        'documentation_url': component_details.get('documentationUrl', ''),
+        'release_note_content': release_content,
+        'generated_at': datetime.datetime.now().isoformat()
+    }
+
+
+class ReleaseTableWriter:
+    """
+    Appends releases to the Keboola output table.
+    Existing primary keys (component_id, tag_name) are loaded once into a set, the CSV file
+    stays open in append mode for the whole run and the manifest is written once on close().
+    The writer is thread-safe.
+    """
+
+    def __init__(self, ci: CommonInterface, table_name: str = "releases"):
+        self.ci = ci
+        self.table_name = table_name
+        self._lock = threading.Lock()
+        self._written = 0
 
         # Create table definition
         logger.info(f"Creating table definition for {table_name}.csv")
-        try:
-            out_table = ci.create_out_table_definition(
-                f'{table_name}.csv',
-                columns=columns,
-                destination=f'out.c-cf-release-notes.{table_name}',
-                primary_key=['component_id', 'tag_name'],  # Changed from component_name to component_id
-                incremental=True,
-                has_header=True
-            )
-            logger.info(f"Table definition created, full_path: {out_table.full_path}")
-        except Exception as table_error:
-            logger.error(f"Error creating table definition: {table_error}")
-            raise
-
-        # Write data to CSV file
-        import csv
-        import os
-        csv_path = out_table.full_path
-
-        # Check if file exists and has content to determine if we need to write header
-        file_exists = os.path.exists(csv_path)
+        self.out_table = ci.create_out_table_definition(
+            f'{table_name}.csv',
+            columns=RELEASE_TABLE_COLUMNS,
+            destination=f'out.c-cf-release-notes.{table_name}',
+            primary_key=['component_id', 'tag_name'],  # Changed from component_name to component_id
+            incremental=True,
+            has_header=True
+        )
+        logger.info(f"Table definition created, full_path: {self.out_table.full_path}")
+
+        # Load primary keys of rows already present in the file (single pass)
+        self._keys = set()
         file_has_content = False
-
-        if file_exists:
-            # Check if file has content (not just header)
+        if os.path.exists(self.out_table.full_path):
             try:
-                with open(csv_path, 'r', encoding='utf-8') as csvfile:
-                    reader = csv.reader(csvfile)
-                    rows = list(reader)
-                    # If we have at least 1 row (header), file has content
-                    file_has_content = len(rows) >= 1
-            except Exception:
-                # If we can't read the file, assume it's empty
-                file_has_content = False
-
-        # Check for duplicates before writing
-        is_duplicate = False
-        if file_exists and file_has_content:
-            try:
-                with open(csv_path, 'r', encoding='utf-8') as csvfile:
+                with open(self.out_table.full_path, 'r', newline='', encoding='utf-8') as csvfile:
                     reader = csv.DictReader(csvfile)
+                    file_has_content = reader.fieldnames is not None
                     for row in reader:
-                        # Check if this exact release already exists
-                        if (row.get('component_id') == table_data['component_id'] and
-                                row.get('tag_name') == table_data['tag_name']):
-                            logger.info(
-                                f"Duplicate found: {table_data['component_id']} {table_data['tag_name']} already exists in table")
-                            is_duplicate = True
-                            break
-                    logger.info(
-                        f"Checked {sum(1 for _ in csv.DictReader(open(csv_path, 'r', encoding='utf-8')))} existing rows for duplicates")
+                        self._keys.add((row.get('component_id'), row.get('tag_name')))
+                logger.info(f"Loaded {len(self._keys)} existing rows from {table_name}.csv for duplicate checks")
             except Exception as e:
-                logger.warning(f"Error checking for duplicates: {e}")
-        else:
-            logger.info(f"File doesn't exist or is empty, no duplicate check needed")
+                logger.warning(f"Error reading existing rows from {table_name}.csv: {e}")
 
-        # Only write if not a duplicate
-        if not is_duplicate:
-            # Append data to CSV file
-            with open(csv_path, 'a', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=columns)
+        self._file = open(self.out_table.full_path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=RELEASE_TABLE_COLUMNS)
 
-                # Write header only if file doesn't exist or is empty
-                if not file_exists or not file_has_content:
-                    writer.writeheader()
+        # Write header only if file doesn't exist or is empty
+        if not file_has_content:
+            self._writer.writeheader()
 
-                writer.writerow(table_data)
+    def __enter__(self):
+        return self
 
-            # Write manifest
-            logger.info(f"Writing manifest for {table_name}.csv")
-            try:
-                ci.write_manifest(out_table)
-                logger.info(f"Manifest written successfully")
-            except Exception as manifest_error:
-                logger.warning(f"Error writing manifest: {manifest_error}")
-                # Continue anyway, the CSV file was written successfully
-
-            logger.info(
-                f"Successfully saved release {release_data['component_name']} {release_data['tag_name']} to table with content (component_id: {release_data['component_name']})")
-            return True
-        else:
-            logger.info(f"Skipped duplicate release {release_data['component_name']} {release_data['tag_name']}")
-            return False
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @metrics.timed("keboola.save_release")
+    def write(self, release_data: ReleaseEntry) -> bool:
+        """Append a release unless its (component_id, tag_name) is already in the table. Returns True if written."""
+        key = (release_data.component_name, release_data.tag_name)
+        with self._lock:
+            if key in self._keys:
+                logger.info(f"Skipped duplicate release {release_data.component_name} {release_data.tag_name}")
+                return False
+            # Reserve the key before the row is built so concurrent duplicates are rejected
+            self._keys.add(key)
+
+        try:
+            table_data = build_release_table_row(release_data)
+            with self._lock:
+                self._writer.writerow(table_data)
+                self._written += 1
+        except Exception:
+            with self._lock:
+                self._keys.discard(key)
+            raise
+
+        logger.info(
+            f"Successfully saved release {release_data.component_name} {release_data.tag_name} to table with content (component_id: {release_data.component_name})")
+        return True
+
+    def close(self) -> None:
+        """Close the CSV file and write the table manifest."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+
+        # Write manifest
+        logger.info(f"Writing manifest for {self.table_name}.csv ({self._written} new rows)")
+        try:
+            self.ci.write_manifest(self.out_table)
+            logger.info("Manifest written successfully")
+        except Exception as manifest_error:
+            logger.warning(f"Error writing manifest: {manifest_error}")
+
+
+def save_release_to_table(ci: CommonInterface, release_data: ReleaseEntry, table_name: str = "releases") -> bool:
+    """
+    Save a single release to the Keboola table with generated content.
+    For more than one release use ReleaseTableWriter, which keeps the table open.
+    """
+    logger.info(f"Starting save_release_to_table for {release_data.component_name} {release_data.tag_name}")
+    try:
+        with ReleaseTableWriter(ci, table_name) as writer:
+            return writer.write(release_data)
 
     except Exception as e:
         logger.error(f"Error saving release to table: {e}")
@@ -237,3 +342,34 @@ def save_release_to_table(ci: CommonInterface, release_data: Dict[str, Any], tab
         import traceback
         logger.error(f"Traceback: {traceback.format_exc()}")
         return False
+
+
+def save_run_metrics_to_table(ci: CommonInterface, rows: List[Dict[str, Any]], started_at: float,
+                              table_name: str = "run_metrics") -> bool:
+    """
+    Append the per-stage metrics of this run (see metrics_utils.Metrics.rows) to an incremental output table,
+    one row per (run_id, stage), so runs can be compared over time.
+    """
+    started = datetime.datetime.fromtimestamp(started_at, datetime.timezone.utc)
+    run_id = os.environ.get('KBC_RUNID') or started.strftime('%Y%m%d%H%M%S')
+    run_started_at = started.isoformat()
+    try:
+        out_table = ci.create_out_table_definition(
+            f'{table_name}.csv',
+            columns=METRICS_TABLE_COLUMNS,
+            destination=f'out.c-cf-release-notes.{table_name}',
+            primary_key=['run_id', 'stage'],
+            incremental=True,
+            has_header=True
+        )
+        with open(out_table.full_path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=METRICS_TABLE_COLUMNS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({'run_id': run_id, 'run_started_at': run_started_at, **row})
+        ci.write_manifest(out_table)
+        logger.info(f"Saved {len(rows)} run metrics rows to {table_name}.csv (run {run_id})")
+        return True
+    except Exception as e:
+        logger.error(f"Error saving run metrics to table: {e}")
+        return False
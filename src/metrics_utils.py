@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Lightweight run instrumentation: wall-clock timers and counters per pipeline stage.
+Stages are timed with `metrics.timer(stage)`; bytes and GraphQL points recorded while a
+stage is active (in the same thread or asyncio task) are attributed to that stage as well,
+so nested stages show what they transferred.
+"""
+import contextlib
+import contextvars
+import functools
+import inspect
+import math
+import threading
+import time
+from typing import Any, Dict, List
+
+from src.config import logger
+
+# Stages active in the current thread / asyncio task, innermost last
+_active_stages = contextvars.ContextVar('metrics_active_stages', default=())
+
+METRICS_TABLE_COLUMNS = [
+    'run_id',
+    'run_started_at',
+    'stage',
+    'count',
+    'errors',
+    'total_seconds',
+    'p50_seconds',
+    'p95_seconds',
+    'max_seconds',
+    'bytes',
+    'graphql_points',
+]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list (0 for an empty list)."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Operation:
+    """Handle yielded by Metrics.timer(); set error to count an operation that failed without raising."""
+    __slots__ = ('error',)
+
+    def __init__(self):
+        self.error = False
+
+
+class StageStats:
+    """Durations and counters of one stage."""
+    __slots__ = ('durations', 'errors', 'bytes', 'points')
+
+    def __init__(self):
+        self.durations = []
+        self.errors = 0
+        self.bytes = 0
+        self.points = 0
+
+
+class Metrics:
+    """Thread-safe registry of stage timings and counters for one run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a new run."""
+        with self._lock:
+            self.started_at = time.time()
+            self._started = time.monotonic()
+            self._stages: Dict[str, StageStats] = {}
+            self._bytes = 0
+            self._points = 0
+
+    def _stage(self, stage: str) -> StageStats:
+        stats = self._stages.get(stage)
+        if stats is None:
+            stats = self._stages[stage] = StageStats()
+        return stats
+
+    def record(self, stage: str, seconds: float, bytes: int = 0, points: int = 0, error: bool = False) -> None:
+        """Record one timed operation of a stage; bytes and points also count for the active stages."""
+        with self._lock:
+            stats = self._stage(stage)
+            stats.durations.append(seconds)
+            stats.errors += error
+            self._bytes += bytes
+            self._points += points
+            for name in {stage, *_active_stages.get()}:
+                self._stage(name).bytes += bytes
+                self._stage(name).points += points
+
+    @contextlib.contextmanager
+    def timer(self, stage: str):
+        """Time the enclosed block as one operation of stage; exceptions are counted as errors and re-raised."""
+        token = _active_stages.set(_active_stages.get() + (stage,))
+        started = time.monotonic()
+        operation = Operation()
+        try:
+            yield operation
+        except BaseException:
+            operation.error = True
+            raise
+        finally:
+            _active_stages.reset(token)
+            self.record(stage, time.monotonic() - started, error=operation.error)
+
+    def timed(self, stage: str):
+        """Decorator timing every call of a function or coroutine function as one operation of stage."""
+        def decorator(function):
+            if inspect.iscoroutinefunction(function):
+                @functools.wraps(function)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timer(stage):
+                        return await function(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Per-stage summary rows, in the order the stages were first seen."""
+        with self._lock:
+            stages = [(name, sorted(stats.durations), stats) for name, stats in self._stages.items()]
+            wall_clock = time.monotonic() - self._started
+            total_bytes, total_points = self._bytes, self._points
+
+        rows = [{
+            'stage': 'run',
+            'count': 1,
+            'errors': 0,
+            'total_seconds': round(wall_clock, 3),
+            'p50_seconds': round(wall_clock, 3),
+            'p95_seconds': round(wall_clock, 3),
+            'max_seconds': round(wall_clock, 3),
+            'bytes': total_bytes,
+            'graphql_points': total_points,
+        }]
+        for name, durations, stats in stages:
+            rows.append({
+                'stage': name,
+                'count': len(durations),
+                'errors': stats.errors,
+                'total_seconds': round(sum(durations), 3),
+                'p50_seconds': round(percentile(durations, 0.5), 3),
+                'p95_seconds': round(percentile(durations, 0.95), 3),
+                'max_seconds': round(durations[-1], 3) if durations else 0.0,
+                'bytes': stats.bytes,
+                'graphql_points': stats.points,
+            })
+        return rows
+
+    def log_summary(self) -> List[Dict[str, Any]]:
+        """Log the per-stage summary as a table and return its rows."""
+        rows = self.rows()
+        width = max(len(row['stage']) for row in rows)
+        logger.info("Run metrics:")
+        logger.info(f"{'stage':<{width}} {'count':>6} {'errors':>6} {'total s':>9} {'p50 s':>8} {'p95 s':>8} "
+                    f"{'max s':>8} {'KiB':>9} {'points':>7}")
+        for row in rows:
+            logger.info(f"{row['stage']:<{width}} {row['count']:>6} {row['errors']:>6} {row['total_seconds']:>9.2f} "
+                        f"{row['p50_seconds']:>8.2f} {row['p95_seconds']:>8.2f} {row['max_seconds']:>8.2f} "
+                        f"{row['bytes'] / 1024:>9.1f} {row['graphql_points']:>7}")
+        return rows
+
+
+# Shared by all modules of a run
+metrics = Metrics()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Compact data model of the release notes pipeline.
+Slotted dataclasses replace the per-tag, per-change and per-release dictionaries;
+dates are parsed once when the GraphQL data is ingested.
+"""
+import bisect
+import datetime
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# v1.2.3 / 1.2 / 1.2.3-rc1; the numeric parts must end at a non-digit so v1.1 never matches v1.10
+VERSION_PATTERN = re.compile(r'v?(\d+)\.(\d+)(?:\.(\d+))?(?!\d)')
+
+
+def parse_github_datetime(value: str) -> datetime.datetime:
+    """Parse a GitHub ISO 8601 timestamp (with a trailing Z) into an aware datetime."""
+    date = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if date.tzinfo is None:
+        return date.replace(tzinfo=datetime.timezone.utc)
+    return date
+
+
+def parse_tag_version(name: str) -> Optional[Tuple[int, int, int]]:
+    """Parse a tag name like v1.2.3 or 1.2 into a (major, minor, patch) tuple, None if it is not a version."""
+    match = VERSION_PATTERN.match(name)
+    if not match:
+        return None
+    major, minor, patch = match.groups()
+    return int(major), int(minor), int(patch or 0)
+
+
+@dataclass(slots=True)
+class Tag:
+    """A git tag and the commit it points to."""
+    name: str
+    commit: str
+    date: datetime.datetime
+    message: str = ''
+    url: str = ''
+
+
+@dataclass(slots=True)
+class Change:
+    """A commit (or merged pull request) between two tags."""
+    commit_sha: str
+    commit_url: str
+    commit_message: str
+    author: str
+    date: Optional[datetime.datetime]
+    title: str
+    pr_number: Optional[str] = None
+    pr_url: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ReleaseEntry:
+    """One generated release note, written as a row of the output table."""
+    date: datetime.datetime
+    repo_name: str
+    github_organization: str
+    component_name: str
+    component_details: Dict[str, Any]
+    component_stage: str
+    tag_name: str
+    previous_tag: str
+    tag_url: str
+    changes: List[Change] = field(default_factory=list)
+    ai_description: Optional[str] = None
+    type: str = 'release'
+
+
+@dataclass(slots=True, eq=False)
+class RepoSnapshot:
+    """
+    Repository data fetched in the batched GraphQL queries.
+    workflow_files are {'path', 'oid', 'size', 'content'} dicts; content is filled by the blob phase.
+    """
+    name: str
+    full_name: str
+    url: str
+    default_branch: str = 'main'
+    tags: List[Tag] = field(default_factory=list)
+    workflow_files: List[Dict[str, Any]] = field(default_factory=list)
+    package_json: Optional[str] = None
+    package_json_blob: Optional[Dict[str, Any]] = None
+    workflows_oid: Optional[str] = None
+    package_json_oid: Optional[str] = None
+
+
+class TagIndex:
+    """
+    Tags of one repository sorted by date, overall and per major.minor version family.
+    Built once per repository; previous-tag lookups are bisections on the sorted dates.
+    """
+    __slots__ = ('_tags', '_dates', '_families')
+
+    def __init__(self, tags: List[Tag]):
+        self._tags = sorted(tags, key=lambda tag: tag.date)
+        self._dates = [tag.date for tag in self._tags]
+        self._families: Dict[Tuple[int, int], Tuple[List[datetime.datetime], List[Tag]]] = {}
+        for tag in self._tags:
+            version = parse_tag_version(tag.name)
+            if version:
+                dates, family_tags = self._families.setdefault(version[:2], ([], []))
+                dates.append(tag.date)
+                family_tags.append(tag)
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    @staticmethod
+    def _latest_before(dates: List[datetime.datetime], tags: List[Tag], tag: Tag) -> Optional[Tag]:
+        index = bisect.bisect_left(dates, tag.date)
+        while index > 0:
+            index -= 1
+            if tags[index].name != tag.name:
+                return tags[index]
+        return None
+
+    def previous_in_family(self, tag: Tag) -> Optional[Tag]:
+        """Most recent tag older than tag from the same major.minor family, None if there is none."""
+        version = parse_tag_version(tag.name)
+        if not version or version[:2] not in self._families:
+            return None
+        return self._latest_before(*self._families[version[:2]], tag)
+
+    def previous(self, tag: Tag) -> Optional[Tag]:
+        """Most recent tag older than tag, None if there is none."""
+        return self._latest_before(self._dates, self._tags, tag)